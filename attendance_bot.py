@@ -5,36 +5,285 @@ Simple bot that actually works - with Google Sheets integration and attendance b
 """
 
 import os
+import html
+import hmac
 import logging
 import asyncio
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ConversationHandler, CallbackQueryHandler, ContextTypes
+from telegram.ext import Application, BaseRateLimiter, SimpleUpdateProcessor, CommandHandler, MessageHandler, TypeHandler, filters, ConversationHandler, CallbackQueryHandler, ContextTypes
+from telegram.error import RetryAfter, TelegramError
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup
-from src.services.sheets_service import GoogleSheetsService
+from src.services.sheets_service import GoogleSheetsService, GREECE_TZ, AttendanceStatus
 from src.services.location_service import LocationService
+from src.services.cache_service import CacheService
+from src.services.background_tasks import spawn_background_task
 import aiohttp
 from aiohttp import web
+import ujson
 import psutil
 import time
 import signal
+import socket
+import weakref
+from collections import OrderedDict
+
+# Faster libuv-based event loop when available (not supported on Windows)
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (LOG_LEVEL=DEBUG shows per-update diagnostics, WARNING silences routine INFO lines)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
 
 # Conversation states
 ASKING_NAME, ASKING_PHONE = range(2)
+REGISTRATION_TIMEOUT = timedelta(minutes=10)
+
+# Admin Telegram IDs (comma separated ADMIN_IDS env var) - IDs, not usernames, since usernames can be taken over
+ADMIN_IDS = frozenset(int(admin_id) for admin_id in os.getenv('ADMIN_IDS', '').split(',') if admin_id.strip())
+
+def is_admin(user) -> bool:
+    """Check if a Telegram user is a bot admin"""
+    return user.id in ADMIN_IDS
+
+# Only the update types the bot handles are requested from Telegram
+ALLOWED_UPDATES = [Update.MESSAGE]
+
+# Long-polling settings (used when the webhook is unavailable)
+POLLING_TIMEOUT = 30  # Telegram holds getUpdates open up to this many seconds
+UPDATE_QUEUE_SIZE = 1000  # Bounded so update bursts apply backpressure instead of growing memory
+CONCURRENT_UPDATES = 256  # Updates processed at once - different chats run in parallel, each chat's updates run in arrival order (ChatOrderedUpdateProcessor, webhook and polling)
+
+# Keep-alive connections to api.telegram.org shared by all outgoing Bot API calls
+BOT_CONNECTION_POOL_SIZE = 16
+
+# Webhook server settings - fixed for the process lifetime (PORT is set by Render.com)
+PORT = int(os.getenv('PORT', 8080))
+RENDER_APP_NAME = os.getenv('RENDER_APP_NAME', 'metropolitan-bot')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL') or f"https://{RENDER_APP_NAME}.onrender.com/webhook"
+# Optional shared secret Telegram echoes in X-Telegram-Bot-Api-Secret-Token (1-256 of A-Z a-z 0-9 _ -)
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET') or None
+WEBHOOK_MAX_CONNECTIONS = 100  # Simultaneous HTTPS connections Telegram may open for update delivery
+LIVENESS_BODY = b'OK'  # Pre-encoded body for the / probe
+WEBHOOK_BACKLOG = 4096  # Pending connections the listening socket queues (Telegram replays backlogged updates in bursts)
+WEBHOOK_SHUTDOWN_TIMEOUT = 5.0  # Seconds in-flight webhook requests get to finish on shutdown
+BOOT_TIME = psutil.boot_time()  # Host boot time never changes - read once for /health uptime
+# Start the CPU measurement window so the first /health probe reports real usage instead of 0.0
+psutil.cpu_percent(interval=None)
+
+# Schedule rendering tables (Monday-Sunday), built once at import
+SCHEDULE_DIVIDER = "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+DAYS_EN = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+DAYS_GR = ('Δευτέρα', 'Τρίτη', 'Τετάρτη', 'Πέμπτη', 'Παρασκευή', 'Σάββατο', 'Κυριακή')
+# Bold Greek day name padded to a 12 character column
+DAY_LABELS = tuple(f"<b>{day}</b>{' ' * (12 - len(day))}" for day in DAYS_GR)
+# Schedule day lines: rest day, today's shift, any other shift
+SCHEDULE_ROW_REST = "🟡 {label}• {schedule}\n"
+SCHEDULE_ROW_TODAY = "🎯 {label}• {schedule} <i>(Σήμερα)</i>\n"
+SCHEDULE_ROW_WORK = "🟢 {label}• {schedule}\n"
+# Per-day (rest, today, work) line templates with the day label already filled in
+SCHEDULE_DAY_ROWS = tuple(
+    tuple(row.replace("{label}", label) for row in (SCHEDULE_ROW_REST, SCHEDULE_ROW_TODAY, SCHEDULE_ROW_WORK))
+    for label in DAY_LABELS
+)
+# Lines for days with no schedule entry, rendered once
+SCHEDULE_EMPTY_ROWS = tuple(rows[0].format(schedule="REST") for rows in SCHEDULE_DAY_ROWS)
+
+# Message templates - filled with str.format at send time
+# All templates are HTML (sent with parse_mode='HTML'); escape user-provided values with html.escape
+WELCOME_BACK_MESSAGE = """
+✅ <b>Καλώς ήρθατε, {name}!</b>
+
+Είστε ήδη εγγεγραμμένος στο σύστημα.
+
+<b>Χρησιμοποιήστε τα κουμπιά κάτω από το πεδίο εισαγωγής:</b>
+"""
+
+PHONE_PROMPT_MESSAGE = """
+✅ Όνομα αποθηκεύθηκε!
+
+Τώρα παρακαλώ γράψτε το τηλέφωνό σας:
+"""
+
+REGISTRATION_COMPLETE_MESSAGE = """
+🎉 <b>Καλώς ήρθατε στο σύστημα, {name}!</b>
+
+Τώρα μπορείτε να χρησιμοποιήσετε το bot για check-in/check-out!
+
+<b>Χρησιμοποιήστε τα κουμπιά κάτω από το πεδίο εισαγωγής:</b>
+"""
+
+ADMIN_PANEL_MESSAGE = """
+👨‍💻 <b>Admin Panel - {name}</b>
+
+<b>Είστε ο admin του bot!</b>
+
+<b>📊 Διαθέσιμες ενέργειες:</b>
+- /workers - Λίστα εργαζομένων
+- /office - Πληροφορίες γραφείου  
+- /monthcreation - Δημιουργία μηνιαίων φύλλων
+- /attendance - Σημερινή παρουσία (admin only)
+
+<b>ℹ️ Για επικοινωνία με εργαζόμενους:</b>
+Χρησιμοποιήστε τα admin commands παραπάνω.
+
+<b>🔧 Quick Actions:</b>
+- Πατήστε /workers για να δείτε όλους τους εργαζόμενους
+- Πατήστε /attendance για σημερινή παρουσία
+- Πατήστε /office για πληροφορίες γραφείου
+"""
+
+ADMIN_CONTACT_MESSAGE = """
+👨‍💻 <b>Admin Panel</b>
+
+<b>Είστε ο admin του bot!</b>
+
+<b>📊 Διαθέσιμες ενέργειες:</b>
+- /workers - Λίστα εργαζομένων
+- /office - Πληροφορίες γραφείου  
+- /monthcreation - Δημιουργία μηνιαίων φύλλων
+
+<b>ℹ️ Για επικοινωνία με εργαζόμενους:</b>
+Χρησιμοποιήστε τα admin commands παραπάνω.
+"""
+
+OFFICE_INFO_MESSAGE = """
+🏢 <b>Πληροφορίες Γραφείου</b>
+
+<b>📍 Τοποθεσία:</b>
+Latitude: {latitude}
+Longitude: {longitude}
+
+<b>📏 Ζώνη Check-in/out:</b>
+Ακτίνα: {radius_meters} μέτρα
+
+<b>ℹ️ Περιγραφή:</b>
+{description}
+
+<b>🗺️ Για να κάνετε check-in/out:</b>
+Πρέπει να είστε μέσα σε {radius_meters}m από το γραφείο.
+"""
+
+# One /workers entry
+WORKER_LIST_ROW = "{index}. <b>{name}</b>\n   📱 {phone}\n   🆔 {telegram_id}\n   📊 {status}\n\n"
+
+CONTACT_MESSAGE = """
+💬 <b>Άμεση Επικοινωνία</b>
+
+<b>Πατήστε το κουμπί για άμεση επικοινωνία:</b>
+"""
+
+REGISTRATION_ERROR_MESSAGE = """
+❌ Σφάλμα κατά την εγγραφή!
+
+Δεν ήταν δυνατή η αποθήκευση στο Google Sheets.
+Παρακαλώ δοκιμάστε ξανά ή επικοινωνήστε με την ομάδα admin.
+"""
+
+CHECKIN_SUCCESS_MESSAGE = """
+✅ <b>Check-in επιτυχής!</b>
+
+<b>Ώρα:</b> {time}
+<b>Ημερομηνία:</b> {date}
+
+<b>Τώρα μπορείτε να κάνετε check-out όταν τελειώσετε τη βάρδια!</b>
+"""
+
+CHECKOUT_SUCCESS_MESSAGE = """
+🚪 <b>Check-out επιτυχής!</b>
+
+<b>Check-in:</b> {check_in}
+<b>Check-out:</b> {check_out}
+<b>Ημερομηνία:</b> {date}
+
+<b>Η βάρδια σας ολοκληρώθηκε! Μπορείτε να κάνετε check-in αύριο.</b>
+"""
+
+ALREADY_CHECKED_IN_MESSAGE = """
+✅ <b>Έχετε ήδη κάνει check-in σήμερα!</b>
+
+<b>Ώρα check-in:</b> {time}
+
+<b>Επόμενη ενέργεια:</b> Πατήστε 🚪 Check Out όταν τελειώσετε τη βάρδια.
+"""
+
+NOT_CHECKED_IN_MESSAGE = """
+❌ <b>Δεν μπορείτε να κάνετε check-out!</b>
+
+<b>Πρέπει πρώτα να κάνετε check-in.</b>
+
+<b>Επόμενη ενέργεια:</b> Πατήστε ✅ Check In για να ξεκινήσετε τη βάρδια.
+"""
+
+BUSY_MESSAGE = """
+⏳ <b>Η προηγούμενη ενέργειά σας επεξεργάζεται ακόμα.</b>
+
+Παρακαλώ περιμένετε λίγο και δοκιμάστε ξανά.
+"""
+
+SHIFT_COMPLETE_MESSAGE = """
+🎉 <b>Η βάρδια σας ολοκληρώθηκε!</b>
+
+<b>Check-in:</b> {check_in}
+<b>Check-out:</b> {check_out}
+
+<b>Επόμενη ενέργεια:</b> Μπορείτε να κάνετε check-in αύριο.
+"""
+
+SHIFT_COMPLETE_TIME_MESSAGE = """
+🎉 <b>Η βάρδια σας ολοκληρώθηκε!</b>
+
+<b>Ώρα:</b> {time}
+
+<b>Επόμενη ενέργεια:</b> Μπορείτε να κάνετε check-in αύριο.
+"""
+
+ATTENDANCE_IN_PROGRESS_MESSAGE = """
+⏳ <b>{label} σε εξέλιξη για {name}</b>
+
+<b>📱 Στείλτε την τοποθεσία σας</b> με το κουμπί παρακάτω:
+
+⚠️ Πρέπει να είστε μέσα σε 300m από το γραφείο
+"""
+
+CHECKIN_IN_PROGRESS_MESSAGE = """
+⚠️ <b>Έχετε ήδη ένα check-in σε εξέλιξη</b>
+
+<b>🔄 Περιμένετε να ολοκληρωθεί το check-in πριν κάνετε check-out.</b>
+"""
+
+LOCATION_REQUEST_MESSAGE = """
+{icon} <b>{label} για {name}</b>
+
+<b>Στείλτε την τοποθεσία σας τώρα:</b>
+
+⚠️ Πρέπει να είστε μέσα σε 300m από το γραφείο
+"""
+
+SCHEDULE_MESSAGE = """
+{current_week}
+{next_week}
+
+""" + SCHEDULE_DIVIDER + """
+<b>Επιλέξτε την επόμενη ενέργεια:</b>
+"""
 
 def load_config():
     """Load all configuration in one place"""
     config = {
         'bot_token': os.getenv('BOT_TOKEN'),
         'spreadsheet_id': os.getenv('SPREADSHEET_ID'),
-        'google_credentials': os.getenv('GOOGLE_CREDENTIALS_JSON')
+        'google_credentials': os.getenv('GOOGLE_CREDENTIALS_JSON'),
+        # Update delivery: 'webhook' (production) or 'polling' (local development)
+        'bot_mode': os.getenv('BOT_MODE', 'webhook').strip().lower(),
+        'webhook_port': PORT,
+        'webhook_url': WEBHOOK_URL
     }
     
     # Validate required values
@@ -42,123 +291,355 @@ def load_config():
         raise ValueError("BOT_TOKEN not found in environment variables!")
     if not config['spreadsheet_id']:
         raise ValueError("SPREADSHEET_ID not found in environment variables!")
+    if config['bot_mode'] not in ('webhook', 'polling'):
+        raise ValueError(f"Invalid BOT_MODE '{config['bot_mode']}' - expected 'webhook' or 'polling'")
+    if not ADMIN_IDS:
+        logger.warning("⚠️ ADMIN_IDS not set - no user has admin access")
     
     return config
 
-# Global variables for pending actions
-pending_actions = {}
+class ChatOrderedUpdateProcessor(SimpleUpdateProcessor):
+    """Processes updates concurrently across chats, one at a time and in arrival order within a chat"""
+    
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        # chat_id -> lock held while one of the chat's updates runs (asyncio.Lock wakes waiters in FIFO order)
+        self._chat_locks = weakref.WeakValueDictionary()
+    
+    async def process_update(self, update, coroutine) -> None:
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            await super().process_update(update, coroutine)
+            return
+        
+        lock = self._chat_locks.get(chat.id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._chat_locks[chat.id] = lock
+        # Chat lock first, concurrency slot second - a chat's backlog waits here without holding
+        # any of the CONCURRENT_UPDATES slots other chats need
+        async with lock:
+            await super().process_update(update, coroutine)
+
+RATE_LIMITER_PRUNE_INTERVAL = 60  # Seconds between drops of idle per-chat buckets
+
+class ChatRateLimiter(BaseRateLimiter):
+    """Token buckets for outgoing Bot API calls - per chat (~1 msg/s with short bursts) and overall (30 msg/s)"""
+    
+    def __init__(self, chat_rate: float = 1.0, chat_burst: int = 3, overall_rate: float = 30.0, max_retries: int = 2):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.overall_rate = overall_rate
+        self.max_retries = max_retries
+        # chat_id -> (tokens, updated_at); tokens go negative when sends are queued ahead
+        self._chat_buckets = {}
+        self._overall_bucket = (overall_rate, time.monotonic())
+        self._last_prune = time.monotonic()
+    
+    def _prune_idle_buckets(self, now: float):
+        """Forget chats whose bucket has refilled - a missing bucket starts full, so nothing changes for them"""
+        refill_seconds = self.chat_burst / self.chat_rate
+        idle_chat_ids = [chat_id for chat_id, (_, updated_at) in self._chat_buckets.items() if now - updated_at >= refill_seconds]
+        for chat_id in idle_chat_ids:
+            del self._chat_buckets[chat_id]
+        self._last_prune = now
+    
+    @staticmethod
+    def _reserve(bucket, rate: float, capacity: float):
+        """Take one token from a bucket, return (new bucket, seconds to wait for it)"""
+        now = time.monotonic()
+        tokens, updated_at = bucket
+        tokens = min(capacity, tokens + (now - updated_at) * rate) - 1
+        return (tokens, now), max(0.0, -tokens / rate)
+    
+    async def initialize(self) -> None:
+        pass
+    
+    async def shutdown(self) -> None:
+        self._chat_buckets.clear()
+    
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        chat_id = data.get('chat_id')
+        
+        # Only messages to a chat count against the limits (getUpdates, setWebhook etc. pass through)
+        if chat_id is not None:
+            self._overall_bucket, overall_wait = self._reserve(self._overall_bucket, self.overall_rate, self.overall_rate)
+            chat_bucket = self._chat_buckets.get(chat_id, (self.chat_burst, time.monotonic()))
+            self._chat_buckets[chat_id], chat_wait = self._reserve(chat_bucket, self.chat_rate, self.chat_burst)
+            
+            wait = max(overall_wait, chat_wait)
+            
+            # Keep one bucket per recently active chat instead of one per chat ever seen
+            now = time.monotonic()
+            if now - self._last_prune > RATE_LIMITER_PRUNE_INTERVAL:
+                self._prune_idle_buckets(now)
+            
+            if wait > 0:
+                await asyncio.sleep(wait)
+        
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                retry_after = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else e.retry_after
+                logger.warning(f"⏳ Telegram flood control on {endpoint} - retrying in {retry_after}s")
+                await asyncio.sleep(retry_after)
+
+class PendingActionStore:
+    """In-memory store of pending check-in/out actions with TTL expiry and a size cap"""
+    
+    def __init__(self, ttl_seconds: int = 600, max_size: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        # user_id -> (expires_at, action_data) - the TTL is fixed, so insertion order is expiry order (oldest first)
+        self._actions = OrderedDict()
+    
+    def put(self, user_id: int, action_data: dict):
+        """Store a pending action, replacing any existing one for the user"""
+        self._actions.pop(user_id, None)
+        
+        # Evict the oldest entries if the cap is reached
+        while len(self._actions) >= self.max_size:
+            oldest_user_id, _ = self._actions.popitem(last=False)
+            logger.debug(f"🧹 Evicted pending action for user {oldest_user_id} (store full)")
+        
+        self._actions[user_id] = (time.monotonic() + self.ttl_seconds, action_data)
+    
+    def get(self, user_id: int):
+        """Get a user's pending action, or None if missing or expired"""
+        entry = self._actions.get(user_id)
+        if not entry:
+            return None
+        
+        if entry[0] <= time.monotonic():
+            del self._actions[user_id]
+            logger.debug(f"🧹 Expired pending action for user {user_id}")
+            return None
+        
+        return entry[1]
+    
+    def pop(self, user_id: int, default=None):
+        """Remove and return a user's pending action"""
+        entry = self._actions.pop(user_id, None)
+        return entry[1] if entry else default
+    
+    def sweep(self) -> int:
+        """Remove all expired actions from the old end, return how many were removed"""
+        now = time.monotonic()
+        expired_count = 0
+        
+        # Stop at the first live entry - everything after it expires later
+        while self._actions:
+            user_id, (expires_at, _) = next(iter(self._actions.items()))
+            if expires_at > now:
+                break
+            self._actions.popitem(last=False)
+            expired_count += 1
+            logger.debug(f"🧹 Expired pending action for user {user_id}")
+        
+        return expired_count
+    
+    def __contains__(self, user_id: int) -> bool:
+        return self.get(user_id) is not None
+    
+    def __len__(self) -> int:
+        return len(self._actions)
+    
+    def __repr__(self) -> str:
+        return repr({user_id: action_data for user_id, (_, action_data) in self._actions.items()})
+
+# Pending actions awaiting location verification (expire after 10 minutes)
+pending_actions = PendingActionStore(ttl_seconds=600)
+# Expired pending actions are swept at half the TTL so none outlive it by more than 5 minutes
+PENDING_SWEEP_INTERVAL = 300
 
 # Add cleanup mechanism for pending actions
 async def cleanup_expired_actions():
     """Clean up expired pending actions to prevent memory leaks"""
-    global pending_actions
-    import pytz
-    greece_tz = pytz.timezone('Europe/Athens')
-    current_time = datetime.now(greece_tz)
-    expired_keys = []
+    expired_count = pending_actions.sweep()
     
-    for user_id, action_data in pending_actions.items():
-        # Remove actions older than 30 minutes
-        if (current_time - action_data['timestamp']).total_seconds() > 1800:
-            expired_keys.append(user_id)
+    if expired_count:
+        logger.info(f"🧹 Cleaned up {expired_count} expired pending actions")
     
-    for key in expired_keys:
-        del pending_actions[key]
-    
-    if expired_keys:
-        logger.info(f"🧹 Cleaned up {len(expired_keys)} expired pending actions")
-    
-    return len(expired_keys)
+    return expired_count
 
 async def monitor_memory_usage():
     """Monitor memory usage and log warnings"""
     try:
+        # Runs from the 15 minute job only - one /proc/meminfo read per tick
         memory = psutil.virtual_memory()
-        if memory.percent > 80:
-            logger.warning(f"⚠️ High memory usage: {memory.percent:.1f}%")
         if memory.percent > 90:
-            logger.error(f"🚨 Critical memory usage: {memory.percent:.1f}%")
-            
-        # Log memory stats periodically
-        logger.info(f"📊 Memory: {memory.percent:.1f}% used, {memory.available / 1024 / 1024 / 1024:.1f}GB available")
+            logger.error("🚨 Critical memory usage: %.1f%%", memory.percent)
+        elif memory.percent > 80:
+            logger.warning("⚠️ High memory usage: %.1f%%", memory.percent)
+        else:
+            # Log memory stats periodically (formatted only if INFO is enabled)
+            logger.info("📊 Memory: %.1f%% used, %.1fGB available", memory.percent, memory.available / 1024 ** 3)
         
     except Exception as e:
         logger.error(f"❌ Error monitoring memory: {e}")
 
 # Add periodic cleanup task
+async def sweep_expired_entries(context: ContextTypes.DEFAULT_TYPE):
+    """Frequent task to drop expired pending actions and cache entries"""
+    try:
+        await cleanup_expired_actions()
+        shared_cache.sweep()
+    except Exception as e:
+        logger.error(f"❌ Error sweeping expired entries: {e}")
+
 async def periodic_cleanup(context: ContextTypes.DEFAULT_TYPE):
-    """Periodic task to clean up expired actions and monitor resources"""
+    """Periodic task to monitor resources"""
     try:
-        # Clean up expired actions
-        cleaned_count = await cleanup_expired_actions()
-        
         # Monitor memory usage
         await monitor_memory_usage()
         
         # Log current pending actions count
-        global pending_actions
-        logger.info(f"📊 Current pending actions: {len(pending_actions)}")
+        logger.info("📊 Current pending actions: %d", len(pending_actions))
         
     except Exception as e:
         logger.error(f"❌ Error in periodic cleanup: {e}")
 
-def create_smart_keyboard(worker_name: str, current_status: str) -> ReplyKeyboardMarkup:
-    """Create smart keyboard based on current attendance status"""
-    
-    if current_status == 'CHECKED_IN':
-        # Worker is checked in, show only check-out button
-        keyboard = [
-            [KeyboardButton("🚪 Check Out")],
-            [KeyboardButton("📅 Πρόγραμμα"), KeyboardButton("📞 Contact")]
-        ]
-    elif current_status == 'COMPLETE':
-        # Worker completed today, show only check-in button
-        keyboard = [
-            [KeyboardButton("✅ Check In")],
-            [KeyboardButton("📅 Πρόγραμμα"), KeyboardButton("📞 Contact")]
-        ]
-    else:
-        # Worker not checked in today, show only check-in button
-        keyboard = [
-            [KeyboardButton("✅ Check In")],
-            [KeyboardButton("📅 Πρόγραμμα"), KeyboardButton("📞 Contact")]
-        ]
+# Shared cache for worker lookups and attendance status (Redis when REDIS_URL is set)
+shared_cache = CacheService(os.getenv('REDIS_URL'))
+
+WORKER_CACHE_TTL = 600  # 10 minutes
+ATTENDANCE_CACHE_TTL = 60  # 1 minute
+CACHEABLE_ATTENDANCE_STATUSES = (AttendanceStatus.NOT_CHECKED_IN, AttendanceStatus.CHECKED_IN, AttendanceStatus.COMPLETE)
+
+# Telegram ID -> in-flight Sheets lookup, so concurrent cache misses share one request
+_worker_lookups = {}
+
+async def cached_find_worker(sheets_service, telegram_id: int):
+    """Find worker by Telegram ID, serving repeated lookups from the shared cache"""
+    key = f"worker:{telegram_id}"
+    worker = await shared_cache.get(key)
+    if worker:
+        return worker
+    
+    lookup = _worker_lookups.get(telegram_id)
+    if lookup is None:
+        lookup = asyncio.ensure_future(sheets_service.find_worker_by_telegram_id(telegram_id))
+        _worker_lookups[telegram_id] = lookup
+        lookup.add_done_callback(lambda _: _worker_lookups.pop(telegram_id, None))
+    worker = await asyncio.shield(lookup)
+    
+    # Only cache registered workers so new registrations are picked up immediately
+    if worker:
+        await shared_cache.set(key, worker, WORKER_CACHE_TTL)
+    
+    return worker
+
+async def invalidate_worker_cache(telegram_id: int):
+    """Drop cached worker lookup for a Telegram ID"""
+    await shared_cache.delete(f"worker:{telegram_id}")
+
+async def prime_worker_cache(sheets_service):
+    """Load the whole WORKERS sheet once so the first button press per worker is a cache hit"""
+    workers = await sheets_service.get_all_workers()
+    for worker in workers:
+        await shared_cache.set(f"worker:{worker['telegram_id']}", worker, WORKER_CACHE_TTL)
+    logger.info("✅ Worker cache primed with %d workers", len(workers))
+
+def attendance_cache_key(worker_name: str) -> str:
+    """Cache key for a worker's attendance status today (Greece date)"""
+    return f"att:{worker_name}:{datetime.now(GREECE_TZ).strftime('%Y%m%d')}"
+
+async def cached_attendance_status(sheets_service, worker_name: str) -> dict:
+    """Get today's attendance status, serving repeated lookups from the shared cache"""
+    key = attendance_cache_key(worker_name)
+    attendance_status = await shared_cache.get(key)
+    if attendance_status:
+        return attendance_status
+    
+    attendance_status = await sheets_service.get_worker_attendance_status(worker_name)
     
-    return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
+    # Don't cache lookup failures
+    if attendance_status['status'] in CACHEABLE_ATTENDANCE_STATUSES:
+        await shared_cache.set(key, attendance_status, ATTENDANCE_CACHE_TTL)
+    
+    return attendance_status
+
+async def cached_schedules_and_attendance(sheets_service, worker_name: str, current_date: str):
+    """Get current/next week schedules and today's attendance status - one Sheets batchGet on a cache miss"""
+    key = attendance_cache_key(worker_name)
+    attendance_status = await shared_cache.get(key)
+    if attendance_status:
+        current_week_schedule, next_week_schedule = await sheets_service.get_two_week_schedules(worker_name, current_date)
+        return current_week_schedule, next_week_schedule, attendance_status
+    
+    current_week_schedule, next_week_schedule, attendance_status = await sheets_service.get_two_week_schedules_and_attendance(worker_name, current_date)
+    
+    # Don't cache lookup failures
+    if attendance_status['status'] in CACHEABLE_ATTENDANCE_STATUSES:
+        await shared_cache.set(key, attendance_status, ATTENDANCE_CACHE_TTL)
+    
+    return current_week_schedule, next_week_schedule, attendance_status
+
+async def store_attendance_status(worker_name: str, status: AttendanceStatus, time: str):
+    """Write-through after a check-in/check-out write so the next status read skips Sheets"""
+    await shared_cache.set(attendance_cache_key(worker_name), {'status': status, 'time': time}, ATTENDANCE_CACHE_TTL)
+
+# Static reply keyboards - built once and shared (Telegram objects are immutable)
+CHECK_OUT_KEYBOARD = ReplyKeyboardMarkup([
+    [KeyboardButton("🚪 Check Out")],
+    [KeyboardButton("📅 Πρόγραμμα"), KeyboardButton("📞 Contact")]
+], resize_keyboard=True)
+
+CHECK_IN_KEYBOARD = ReplyKeyboardMarkup([
+    [KeyboardButton("✅ Check In")],
+    [KeyboardButton("📅 Πρόγραμμα"), KeyboardButton("📞 Contact")]
+], resize_keyboard=True)
+
+LOCATION_REQUEST_KEYBOARD = ReplyKeyboardMarkup([
+    [KeyboardButton("📍 Στείλε την τοποθεσία μου", request_location=True)],
+    [KeyboardButton("🏠 Πίσω στο μενού")]
+], resize_keyboard=True, one_time_keyboard=True)
+
+MAIN_MENU_KEYBOARD = ReplyKeyboardMarkup([
+    [KeyboardButton("✅ Check In"), KeyboardButton("🚪 Check Out")],
+    [KeyboardButton("📅 My Schedule"), KeyboardButton("📞 Contact")]
+], resize_keyboard=True)
+
+CONTACT_ADMIN_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("💬 Chat με Admin", url="https://t.me/DenisZgl")]
+])
+
+# Checked in workers only see check-out; every other status sees check-in
+KEYBOARD_BY_STATUS = {AttendanceStatus.CHECKED_IN: CHECK_OUT_KEYBOARD}
+
+def create_smart_keyboard(current_status: AttendanceStatus) -> ReplyKeyboardMarkup:
+    """Pick the shared menu keyboard for the current attendance status"""
+    return KEYBOARD_BY_STATUS.get(current_status, CHECK_IN_KEYBOARD)
 
 async def start_command(update: Update, context):
     """Handle /start command"""
     # Get services from context
     sheets_service = context.bot_data.get('sheets_service')
-    location_service = context.bot_data.get('location_service')
     
     user = update.effective_user
     
     # Check if worker already exists
-    existing_worker = await sheets_service.find_worker_by_telegram_id(user.id)
+    existing_worker = await cached_find_worker(sheets_service, user.id)
     
     if existing_worker:
         # Existing worker - show smart keyboard based on current status
         worker_name = existing_worker['name']
         
         # Get current attendance status
-        attendance_status = await sheets_service.get_worker_attendance_status(worker_name)
+        attendance_status = await cached_attendance_status(sheets_service, worker_name)
         current_status = attendance_status['status']
         
         # Create smart keyboard based on current status
-        smart_keyboard = create_smart_keyboard(worker_name, current_status)
+        smart_keyboard = create_smart_keyboard(current_status)
         
         # Show welcome message with smart keyboard
-        welcome_msg = f"""
-✅ **Καλώς ήρθατε, {worker_name}!**
-
-Είστε ήδη εγγεγραμμένος στο σύστημα.
-
-**Χρησιμοποιήστε τα κουμπιά κάτω από το πεδίο εισαγωγής:**
-        """
+        welcome_msg = WELCOME_BACK_MESSAGE.format(name=html.escape(worker_name))
         
         # Send message with smart keyboard
-        await update.message.reply_text(welcome_msg, parse_mode='Markdown', reply_markup=smart_keyboard)
+        await update.message.reply_text(welcome_msg, parse_mode='HTML', reply_markup=smart_keyboard)
         
         return ConversationHandler.END
     else:
@@ -181,13 +662,7 @@ async def handle_name(update: Update, context):
     # Store name and ask for phone
     context.user_data['registration']['name'] = name
     
-    phone_message = """
-✅ Όνομα αποθηκεύθηκε!
-
-Τώρα παρακαλώ γράψτε το τηλέφωνό σας:
-    """
-    
-    await update.message.reply_text(phone_message)
+    await update.message.reply_text(PHONE_PROMPT_MESSAGE)
     return ASKING_PHONE
 
 async def handle_phone(update: Update, context):
@@ -199,7 +674,10 @@ async def handle_phone(update: Update, context):
         return ASKING_PHONE
     
     # Get registration data
-    reg_data = context.user_data['registration']
+    reg_data = context.user_data.get('registration')
+    if not reg_data:
+        # Already completed by an earlier message from the same user
+        return ConversationHandler.END
     telegram_id = reg_data['telegram_id']
     name = reg_data['name']
     
@@ -209,44 +687,30 @@ async def handle_phone(update: Update, context):
         await update.message.reply_text("❌ Σφάλμα: Δεν μπορεί να βρεθεί η υπηρεσία Google Sheets.")
         return ConversationHandler.END
     
-    # Get services from context
-    sheets_service = context.bot_data.get('sheets_service')
-    
     # Add worker to Google Sheets
     success = await sheets_service.add_worker(telegram_id, name, phone)
     
     if success:
+        await invalidate_worker_cache(telegram_id)
+    
         success_msg = "✅ Η εγγραφή σας ολοκληρώθηκε!"
-        
+    
         await update.message.reply_text(success_msg)
-        
+    
         # Clear data
         context.user_data.pop('registration', None)
-        
+    
         # Show attendance menu for new worker
         # Create smart keyboard for new worker (not checked in)
-        smart_keyboard = create_smart_keyboard(name, 'NOT_CHECKED_IN')
-        
-        menu_msg = f"""
-🎉 **Καλώς ήρθατε στο σύστημα, {name}!**
-
-Τώρα μπορείτε να χρησιμοποιήσετε το bot για check-in/check-out!
-
-**Χρησιμοποιήστε τα κουμπιά κάτω από το πεδίο εισαγωγής:**
-        """
-        
+        smart_keyboard = create_smart_keyboard(AttendanceStatus.NOT_CHECKED_IN)
+    
+        menu_msg = REGISTRATION_COMPLETE_MESSAGE.format(name=html.escape(name))
+    
         # Send message with smart keyboard
-        await update.message.reply_text(menu_msg, parse_mode='Markdown', reply_markup=smart_keyboard)
-        
+        await update.message.reply_text(menu_msg, parse_mode='HTML', reply_markup=smart_keyboard)
+    
     else:
-        error_msg = """
-❌ Σφάλμα κατά την εγγραφή!
-
-Δεν ήταν δυνατή η αποθήκευση στο Google Sheets.
-Παρακαλώ δοκιμάστε ξανά ή επικοινωνήστε με την ομάδα admin.
-        """
-        
-        await update.message.reply_text(error_msg)
+        await update.message.reply_text(REGISTRATION_ERROR_MESSAGE)
     
     return ConversationHandler.END
 
@@ -262,20 +726,58 @@ async def cancel_registration(update: Update, context):
 # async def handle_checkin() - REMOVED  
 # async def handle_checkout() - REMOVED
 
+def format_sheet_date(date: datetime) -> str:
+    """Format a date the way the week sheets expect it (e.g. 7/18/2025)"""
+    return f"{date.month}/{date.day}/{date.year}"
+
+def format_attendance_clock(now: datetime):
+    """Format one clock reading as the attendance (HH:MM, DD/MM/YYYY) pair without strftime"""
+    return f"{now.hour:02d}:{now.minute:02d}", f"{now.day:02d}/{now.month:02d}/{now.year}"
+
+def render_week_schedule(header: str, week_schedule, empty_text: str, today_name: str = None) -> str:
+    """Render a weekly schedule block - always shows all 7 days, empty slots are REST"""
+    parts = [header, "\n", SCHEDULE_DIVIDER, "\n"]
+    
+    if not week_schedule:
+        parts.append(empty_text)
+        return "".join(parts)
+    
+    parts.extend(render_schedule_day(day, day_rows, empty_row, week_schedule.get(day), today_name)
+                 for day, day_rows, empty_row in zip(DAYS_EN, SCHEDULE_DAY_ROWS, SCHEDULE_EMPTY_ROWS))
+    return "".join(parts)
+
+def render_schedule_day(day: str, day_rows: tuple, empty_row: str, schedule, today_name: str) -> str:
+    """Render one day line - rest, today's shift or a regular shift"""
+    stripped = schedule.strip() if schedule else ""
+    if not stripped:
+        # Day not in schedule or has no data = REST day
+        return empty_row
+    rest_row, today_row, work_row = day_rows
+    if stripped.upper() in ('REST', 'OFF'):
+        row_template = rest_row
+    elif day == today_name:
+        row_template = today_row
+    else:
+        row_template = work_row
+    return row_template.format(schedule=html.escape(schedule))
+
+def render_schedule_message(current_week_schedule, next_week_schedule, today_name: str) -> str:
+    """Render the two-week schedule reply (today is highlighted in the current week)"""
+    current_week_text = render_week_schedule(
+        "<b>📅 ΤΡΕΧΟΥΣΑ ΕΒΔΟΜΑΔΑ</b>", current_week_schedule, "⚠️ Δεν βρέθηκε πρόγραμμα",
+        today_name=today_name
+    )
+    next_week_text = "\n" + render_week_schedule(
+        "<b>📅 ΕΠΟΜΕΝΗ ΕΒΔΟΜΑΔΑ</b>", next_week_schedule, "⚪ Δεν έχει οριστεί ακόμα"
+    )
+    return SCHEDULE_MESSAGE.format(current_week=current_week_text, next_week=next_week_text)
+
 async def handle_schedule_request(query, context, worker_name: str):
     """Handle weekly schedule request"""
     try:
-        from datetime import datetime, timedelta
-        
         # Get current date and format for sheets (Greece timezone)
-        import pytz
-        greece_tz = pytz.timezone('Europe/Athens')
-        today = datetime.now(greece_tz)
-        # Fix date format for macOS compatibility
-        try:
-            current_date = today.strftime("%-m/%-d/%Y")  # Format: 7/18/2025
-        except ValueError:
-            current_date = today.strftime("%m/%d/%Y")  # Format: 07/18/2025
+        today = datetime.now(GREECE_TZ)
+        current_date = format_sheet_date(today)
         
         # Get worker's telegram ID to find their schedule
         user = query.from_user
@@ -287,177 +789,51 @@ async def handle_schedule_request(query, context, worker_name: str):
             return
         
         # Get worker info
-        existing_worker = await sheets_service.find_worker_by_telegram_id(user.id)
+        existing_worker = await cached_find_worker(sheets_service, user.id)
         if not existing_worker:
             await query.edit_message_text("❌ Δεν είστε εγγεγραμμένος στο σύστημα.")
             return
         
-        # Get current week schedule
-        current_week_schedule = await sheets_service.get_weekly_schedule(str(user.id), current_date)
-        
-        # Get next week schedule using intelligent B3-based detection
+        # Current and next week (B3-based detection) plus today's status in a single batchGet
         worker_name = existing_worker['name']
-        next_week_schedule = await sheets_service.get_intelligent_next_week_schedule(current_date, worker_name)
+        current_week_schedule, next_week_schedule, attendance_status = await cached_schedules_and_attendance(sheets_service, worker_name, current_date)
         
         # Create smart keyboard based on current status
-        attendance_status = await sheets_service.get_worker_attendance_status(worker_name)
         current_status = attendance_status['status']
-        smart_keyboard = create_smart_keyboard(worker_name, current_status)
+        smart_keyboard = create_smart_keyboard(current_status)
         
-        # Format current week schedule with improved design
-        current_week_text = ""
-        if current_week_schedule:
-            current_week_text = "**📅 ΤΡΕΧΟΥΣΑ ΕΒΔΟΜΑΔΑ**\n"
-            current_week_text += "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-            
-            days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            day_names_gr = ['Δευτέρα', 'Τρίτη', 'Τετάρτη', 'Πέμπτη', 'Παρασκευή', 'Σάββατο', 'Κυριακή']
-            
-            for i, day in enumerate(days):
-                # Always show all 7 days, regardless of data availability
-                if day in current_week_schedule and current_week_schedule[day]:
-                    schedule = current_week_schedule[day]
-                    if schedule and schedule.strip():
-                        if schedule.strip().upper() in ['REST', 'OFF']:
-                            current_week_text += f"🟡 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• {schedule}\n"
-                        else:
-                            # Check if it's today
-                            today_name = today.strftime("%A")
-                            if day == today_name:
-                                current_week_text += f"🎯 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• {schedule} _(Σήμερα)_\n"
-                            else:
-                                current_week_text += f"🟢 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• {schedule}\n"
-                    else:
-                        # Empty slots are treated as REST days
-                        current_week_text += f"🟡 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• REST\n"
-                else:
-                    # Day not in schedule or has no data = REST day
-                    current_week_text += f"🟡 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• REST\n"
-        else:
-            current_week_text = "**📅 ΤΡΕΧΟΥΣΑ ΕΒΔΟΜΑΔΑ**\n"
-            current_week_text += "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-            current_week_text += "⚠️ Δεν βρέθηκε πρόγραμμα"
-        
-        # Format next week schedule with improved design
-        next_week_text = ""
-        if next_week_schedule:
-            next_week_text = "\n**📅 ΕΠΟΜΕΝΗ ΕΒΔΟΜΑΔΑ**\n"
-            next_week_text += "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-            
-            days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            day_names_gr = ['Δευτέρα', 'Τρίτη', 'Τετάρτη', 'Πέμπτη', 'Παρασκευή', 'Σάββατο', 'Κυριακή']
-            
-            for i, day in enumerate(days):
-                # Always show all 7 days, regardless of data availability
-                if day in next_week_schedule and next_week_schedule[day]:
-                    schedule = next_week_schedule[day]
-                    if schedule and schedule.strip():
-                        if schedule.strip().upper() in ['REST', 'OFF']:
-                            next_week_text += f"🟡 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• {schedule}\n"
-                        else:
-                            next_week_text += f"🟢 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• {schedule}\n"
-                    else:
-                        # Empty slots are treated as REST days
-                        next_week_text += f"🟡 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• REST\n"
-                else:
-                    # Day not in schedule or has no data = REST day
-                    next_week_text += f"🟡 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• REST\n"
-        else:
-            next_week_text = "\n**📅 ΕΠΟΜΕΝΗ ΕΒΔΟΜΑΔΑ**\n"
-            next_week_text += "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-            next_week_text += "⚪ Δεν έχει οριστεί ακόμα"
-        
-        message = f"""
-{current_week_text}
-{next_week_text}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-**Επιλέξτε την επόμενη ενέργεια:**
-        """
+        # Format both weeks with improved design
+        message = render_schedule_message(current_week_schedule, next_week_schedule, today.strftime("%A"))
         
-        await query.edit_message_text(message, parse_mode='Markdown', reply_markup=smart_keyboard)
+        await query.edit_message_text(message, parse_mode='HTML', reply_markup=smart_keyboard)
         
     except Exception as e:
         logger.error(f"Error during schedule request: {e}")
         await query.edit_message_text("❌ Σφάλμα κατά την ανάκτηση του προγράμματος.")
 
-async def handle_contact(query):
+async def handle_contact(query, context):
     """Handle contact request"""
     user = query.from_user
+    sheets_service = context.bot_data.get('sheets_service')
     
     # Check if user is admin (you)
-    if user.username == "DenisZgl" or user.id == 123456789:  # Replace with your actual Telegram ID
+    if is_admin(user):
         # Admin sees different message
-        admin_message = """
-👨‍💻 **Admin Panel**
-
-**Είστε ο admin του bot!**
-
-**📊 Διαθέσιμες ενέργειες:**
-- /workers - Λίστα εργαζομένων
-- /office - Πληροφορίες γραφείου  
-- /monthcreation - Δημιουργία μηνιαίων φύλλων
-
-**ℹ️ Για επικοινωνία με εργαζόμενους:**
-Χρησιμοποιήστε τα admin commands παραπάνω.
-        """
-        
-        # Get worker info to show back button
-        existing_worker = await sheets_service.find_worker_by_telegram_id(user.id)
+        message = ADMIN_CONTACT_MESSAGE
         
+        # Registered admins get the menu keyboard back
+        existing_worker = await cached_find_worker(sheets_service, user.id)
         if existing_worker:
-            worker_name = existing_worker['name']
-            attendance_status = await sheets_service.get_worker_attendance_status(worker_name)
-            keyboard = ReplyKeyboardMarkup([
-                [KeyboardButton("✅ Check In"), KeyboardButton("🚪 Check Out")],
-                [KeyboardButton("📅 My Schedule"), KeyboardButton("📞 Contact")]
-            ], resize_keyboard=True)
-            
-            await query.edit_message_text(admin_message, parse_mode='Markdown', reply_markup=keyboard)
+            keyboard = MAIN_MENU_KEYBOARD
         else:
-            await query.edit_message_text(admin_message, parse_mode='Markdown')
+            keyboard = None
     else:
         # Regular users get contact button
-        contact_keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("💬 Chat με Admin", url="https://t.me/DenisZgl")]
-        ])
-        
-        contact_message = """
-💬 **Άμεση Επικοινωνία**
-
-**Πατήστε το κουμπί για άμεση επικοινωνία:**
-        """
+        keyboard = CONTACT_ADMIN_KEYBOARD
         
-        # Get worker info to show back button
-        existing_worker = await sheets_service.find_worker_by_telegram_id(user.id)
-        
-        if existing_worker:
-            worker_name = existing_worker['name']
-            attendance_status = await sheets_service.get_worker_attendance_status(worker_name)
-            keyboard = ReplyKeyboardMarkup([
-                [KeyboardButton("✅ Check In"), KeyboardButton("🚪 Check Out")],
-                [KeyboardButton("📅 My Schedule"), KeyboardButton("📞 Contact")]
-            ], resize_keyboard=True)
-            
-            await query.edit_message_text(contact_message, parse_mode='Markdown', reply_markup=contact_keyboard)
-        else:
-            await query.edit_message_text(contact_message, parse_mode='Markdown', reply_markup=contact_keyboard)
-    
-    # Get worker info to show back button
-    user = query.from_user
-    existing_worker = await sheets_service.find_worker_by_telegram_id(user.id)
+        message = CONTACT_MESSAGE
     
-    if existing_worker:
-        worker_name = existing_worker['name']
-        attendance_status = await sheets_service.get_worker_attendance_status(worker_name)
-        keyboard = ReplyKeyboardMarkup([
-            [KeyboardButton("✅ Check In"), KeyboardButton("🚪 Check Out")],
-            [KeyboardButton("📅 My Schedule"), KeyboardButton("📞 Contact")]
-        ], resize_keyboard=True)
-        
-        await query.edit_message_text(contact_message, parse_mode='Markdown', reply_markup=contact_keyboard)
-    else:
-        await query.edit_message_text(contact_message, parse_mode='Markdown', reply_markup=contact_keyboard)
+    await query.edit_message_text(message, parse_mode='HTML', reply_markup=keyboard)
 
 async def list_workers_command(update: Update, context):
     """List all workers (admin command)"""
@@ -468,272 +844,251 @@ async def list_workers_command(update: Update, context):
         await update.message.reply_text("📊 Δεν υπάρχουν εγγεγραμμένοι εργαζόμενοι.")
         return
     
-    workers_list = "📊 **Λίστα Εργαζομένων:**\n\n"
-    
-    for i, worker in enumerate(workers, 1):
-        workers_list += f"{i}. **{worker['name']}**\n"
-        workers_list += f"   📱 {worker['phone']}\n"
-        workers_list += f"   🆔 {worker['telegram_id']}\n"
-        workers_list += f"   📊 {worker['status']}\n\n"
+    workers_list = "📊 <b>Λίστα Εργαζομένων:</b>\n\n" + "".join(
+        WORKER_LIST_ROW.format(
+            index=i,
+            name=html.escape(worker['name']),
+            phone=html.escape(worker['phone']),
+            telegram_id=worker['telegram_id'],
+            status=html.escape(worker['status'])
+        )
+        for i, worker in enumerate(workers, 1)
+    )
     
-    await update.message.reply_text(workers_list, parse_mode='Markdown')
+    await update.message.reply_text(workers_list, parse_mode='HTML')
 
 async def office_info_command(update: Update, context):
     """Show office zone information"""
-    location_service = context.bot_data.get('location_service')
-    office_info = location_service.get_office_info()
+    office_info = context.bot_data['office_info']
     
-    message = f"""
-🏢 **Πληροφορίες Γραφείου**
-
-**📍 Τοποθεσία:**
-Latitude: {office_info['latitude']}
-Longitude: {office_info['longitude']}
-
-**📏 Ζώνη Check-in/out:**
-Ακτίνα: {office_info['radius_meters']} μέτρα
-
-**ℹ️ Περιγραφή:**
-{office_info['description']}
-
-**🗺️ Για να κάνετε check-in/out:**
-Πρέπει να είστε μέσα σε {office_info['radius_meters']}m από το γραφείο.
-    """
+    message = OFFICE_INFO_MESSAGE.format(
+        latitude=office_info['latitude'],
+        longitude=office_info['longitude'],
+        radius_meters=office_info['radius_meters'],
+        description=html.escape(str(office_info['description']))
+    )
     
-    await update.message.reply_text(message, parse_mode='Markdown')
+    await update.message.reply_text(message, parse_mode='HTML')
 
 
 
 async def handle_location_message(update: Update, context):
     """Handle location messages for check-in/out"""
-    try:
-        user = update.effective_user
-        user_id = user.id
-        
-        # Check if user has a pending action
-        pending_action = pending_actions.get(user_id)
-        
-        logger.info(f"🔍 DEBUG: Checking pending actions for user {user_id}")
-        logger.info(f"🔍 DEBUG: Current pending actions: {pending_actions}")
-        logger.info(f"🔍 DEBUG: User's pending action: {pending_action}")
-        
-        if not pending_action:
-            # No pending action, ignore location
-            logger.info(f"🔍 DEBUG: No pending action for user {user_id}, ignoring location")
+    user_id = update.effective_user.id
+    
+    # Check if user has a pending action
+    pending_action = pending_actions.get(user_id)
+    
+    logger.debug("🔍 Pending action for user %s: %s", user_id, pending_action)
+    
+    if not pending_action:
+        if user_id in _attendance_writes:
+            # Duplicate location - the check-in/out it belongs to is still being saved
+            logger.info(f"⏭️ Ignoring duplicate location from user {user_id}")
+            await update.message.reply_text(BUSY_MESSAGE, parse_mode='HTML')
             return
-        
+        # No pending action, ignore location
+        logger.debug("🔍 No pending action for user %s, ignoring location", user_id)
+        return
+    
+    worker_name = pending_action['worker_name']
+    
+    try:
         # Get location from message
         if not update.message.location:
             await update.message.reply_text("❌ Παρακαλώ στείλτε την τοποθεσία σας (location), όχι κείμενο.")
-            # Clear pending action for invalid location so user can try again
-            pending_actions.pop(user_id, None)
             # Return to main menu even for invalid location
-            await return_to_main_menu(update, context, user_id)
+            await return_to_main_menu(update, context, user_id, worker_name)
             return
         
         location = update.message.location
         latitude = location.latitude
         longitude = location.longitude
         
-        logger.info(f"🔍 DEBUG: Received location from user {user_id}:")
-        logger.info(f"🔍 DEBUG:   Raw location object: {location}")
-        logger.info(f"🔍 DEBUG:   Latitude: {latitude}")
-        logger.info(f"🔍 DEBUG:   Longitude: {longitude}")
-        logger.info(f"🔍 DEBUG:   Location type: {type(latitude)}, {type(longitude)}")
+        # Raw coordinates only at DEBUG level - they are personal data
+        logger.debug("🔍 Received location from user %s: %s, %s", user_id, latitude, longitude)
         
         # Get services from context
         location_service = context.bot_data.get('location_service')
         if not location_service:
-            logger.error("🔍 DEBUG: Location service not available in context")
             logger.error("Location service not available in context")
             await update.message.reply_text("❌ Σφάλμα: Δεν είναι διαθέσιμη η υπηρεσία τοποθεσίας.")
-            # Clear pending action when service unavailable so user can try again
-            pending_actions.pop(user_id, None)
-            await return_to_main_menu(update, context, user_id)
+            await return_to_main_menu(update, context, user_id, worker_name)
             return
         
-        logger.info(f"🔍 DEBUG: Location service found, calling is_within_office_zone...")
         # Verify location is within office zone
         location_result = location_service.is_within_office_zone(latitude, longitude)
-        logger.info(f"🔍 DEBUG: Location verification result: {location_result}")
+        logger.debug("🔍 Location verification result for user %s: %s", user_id, location_result)
         
         if not location_result['is_within']:
             # Location outside zone - show error and return to main menu
             location_msg = location_service.format_location_message(location_result)
-            await update.message.reply_text(location_msg, parse_mode='Markdown')
-            
-            # IMPORTANT: Clear pending action when location fails so user can try again
-            pending_actions.pop(user_id, None)
+            await update.message.reply_text(location_msg, parse_mode='HTML')
             
             # Return to main menu after failed location check
-            await return_to_main_menu(update, context, user_id)
+            await return_to_main_menu(update, context, user_id, worker_name)
             return
         
         # Location verified, proceed with action
-        logger.info(f"🔍 DEBUG: Location verified, proceeding with action: {pending_action['action']}")
+        logger.debug("🔍 Location verified for user %s, completing %s", user_id, pending_action['action'])
         if pending_action['action'] == 'checkin':
-            logger.info(f"🔍 DEBUG: Calling complete_checkin for user {user_id}")
             await complete_checkin(update, context, pending_action, location_result)
         elif pending_action['action'] == 'checkout':
-            logger.info(f"🔍 DEBUG: Calling complete_checkout for user {user_id}")
             await complete_checkout(update, context, pending_action, location_result)
         
-        # Clear pending action
-        logger.info(f"🔍 DEBUG: Clearing pending action for user {user_id}")
-        pending_actions.pop(user_id, None)
-        logger.info(f"🔍 DEBUG: Pending actions after clearing: {pending_actions}")
-        
     except Exception as e:
         logger.error(f"Error handling location message: {e}")
         await update.message.reply_text("❌ Σφάλμα κατά την επεξεργασία της τοποθεσίας.")
-        # Clear pending action on error so user can try again
-        pending_actions.pop(user_id, None)
         # Return to main menu even on error
-        await return_to_main_menu(update, context, user_id)
+        await return_to_main_menu(update, context, user_id, worker_name)
+    finally:
+        # Every outcome - success, rejected location or error - clears the pending action so the user can try again
+        pending_actions.pop(user_id, None)
 
-async def return_to_main_menu(update: Update, context, user_id: int):
-    """Return user to main menu after any check-in/out attempt"""
+async def return_to_main_menu(update: Update, context, user_id: int, worker_name: str = None):
+    """Return user to main menu after any check-in/out attempt (pass worker_name when already known)"""
     try:
-        # Get worker info
         sheets_service = context.bot_data.get('sheets_service')
-        location_service = context.bot_data.get('location_service')
-        existing_worker = await sheets_service.find_worker_by_telegram_id(user_id)
-        if not existing_worker:
-            return
-        
-        worker_name = existing_worker['name']
+        if not worker_name:
+            # Get worker info
+            existing_worker = await cached_find_worker(sheets_service, user_id)
+            if not existing_worker:
+                return
+            
+            worker_name = existing_worker['name']
         
         # Get current attendance status
-        attendance_status = await sheets_service.get_worker_attendance_status(worker_name)
+        attendance_status = await cached_attendance_status(sheets_service, worker_name)
         current_status = attendance_status['status']
         
         # Create smart keyboard based on current status
-        smart_keyboard = create_smart_keyboard(worker_name, current_status)
+        smart_keyboard = create_smart_keyboard(current_status)
         
         # Show main menu message
-        menu_msg = f"🏠 Επιστροφή στο μενού"
-        
-        # Send message with smart keyboard
-        await update.message.reply_text(menu_msg, parse_mode='Markdown', reply_markup=smart_keyboard)
+        # Send plain menu message with smart keyboard
+        await update.message.reply_text("🏠 Επιστροφή στο μενού", reply_markup=smart_keyboard)
         
     except Exception as e:
         logger.error(f"Error returning to main menu: {e}")
         # Fallback: just show basic message
         await update.message.reply_text("🏠 Επιστροφή στο κύριο μενού. Χρησιμοποιήστε /start για να ξαναρχίσετε.")
 
+ATTENDANCE_WRITE_ATTEMPTS = 2  # The background write is retried once before the user is told
+ATTENDANCE_SHUTDOWN_TIMEOUT = 20.0  # Seconds shutdown waits for confirmed check-ins/outs to reach Sheets (inside Render's 30s SIGTERM grace)
+
+# user_id -> background check-in/out write still in flight
+_attendance_writes = {}
+
+def track_attendance_write(user_id: int, task: asyncio.Task):
+    """Remember a user's in-flight attendance write until it finishes"""
+    _attendance_writes[user_id] = task
+    
+    def forget(done):
+        # A newer write may already have replaced this one
+        if _attendance_writes.get(user_id) is done:
+            del _attendance_writes[user_id]
+    
+    task.add_done_callback(forget)
+
+async def wait_for_attendance_write(user_id: int):
+    """Wait for the user's in-flight attendance write so follow-ups read the saved (or reverted) status"""
+    task = _attendance_writes.get(user_id)
+    if task:
+        # persist_attendance reports its own failures; shield so a cancelled handler doesn't cancel the write
+        await asyncio.wait([asyncio.shield(task)])
+
+async def persist_attendance(update: Update, sheets_service, worker_name: str, action: str, previous_status: AttendanceStatus,
+                             check_in_time: str, check_out_time: str = None):
+    """Write a confirmed check-in/out to the monthly sheet after the user has been answered"""
+    # Follow-up check-in/out requests wait for this write (see wait_for_attendance_write) instead of reading stale data
+    for attempt in range(1, ATTENDANCE_WRITE_ATTEMPTS + 1):
+        try:
+            if await sheets_service.update_attendance_cell(
+                sheets_service.get_current_month_sheet_name(),
+                worker_name,
+                check_in_time=check_in_time,
+                check_out_time=check_out_time
+            ):
+                return
+        except Exception as e:
+            logger.error(f"❌ Error saving {action} for {worker_name} (attempt {attempt}): {e}")
+    
+    # Undo the optimistic status and tell the user the action didn't stick
+    logger.error(f"❌ Could not save {action} for {worker_name} after {ATTENDANCE_WRITE_ATTEMPTS} attempts")
+    await shared_cache.delete(attendance_cache_key(worker_name))
+    label = ATTENDANCE_ACTIONS[action][1]
+    await update.message.reply_text(
+        f"❌ Σφάλμα κατά το {label.lower()}. Παρακαλώ δοκιμάστε ξανά.",
+        reply_markup=create_smart_keyboard(previous_status)
+    )
+
 async def complete_checkin(update: Update, context, pending_data: dict, location_result: dict):
     """Complete check-in after location verification"""
     try:
         sheets_service = context.bot_data.get('sheets_service')
-        location_service = context.bot_data.get('location_service')
         worker_name = pending_data['worker_name']
         
-        # Use Greece timezone for check-in time
-        import pytz
-        greece_tz = pytz.timezone('Europe/Athens')
-        current_time = datetime.now(greece_tz).strftime("%H:%M")
+        # Use Greece timezone for check-in time and date (read the clock once)
+        now = datetime.now(GREECE_TZ)
+        current_time, current_date = format_attendance_clock(now)
         
-        # Update attendance sheet
-        success = await sheets_service.update_attendance_cell(
-            sheets_service.get_current_month_sheet_name(),
-            worker_name,
-            check_in_time=current_time
-        )
+        # Answer right away - the sheet is written in the background (reverted and reported if it fails)
+        await store_attendance_status(worker_name, AttendanceStatus.CHECKED_IN, current_time)
         
-        if success:
-            # Create smart keyboard for check-in status
-            smart_keyboard = create_smart_keyboard(worker_name, 'CHECKED_IN')
-            
-            # Get current date in Greece timezone for display
-            current_date = datetime.now(greece_tz).strftime("%d/%m/%Y")
-            
-            message = f"""
-✅ **Check-in επιτυχής!**
-
-**Ώρα:** {current_time}
-**Ημερομηνία:** {current_date}
-
-**Τώρα μπορείτε να κάνετε check-out όταν τελειώσετε τη βάρδια!**
-            """
-            
-            # Send success message with smart keyboard
-            await update.message.reply_text(message, parse_mode='Markdown', reply_markup=smart_keyboard)
-        else:
-            await update.message.reply_text("❌ Σφάλμα κατά το check-in. Παρακαλώ δοκιμάστε ξανά.")
-            # Clear pending action on failure so user can try again
-            user_id = update.effective_user.id
-            pending_actions.pop(user_id, None)
+        # Create smart keyboard for check-in status
+        smart_keyboard = create_smart_keyboard(AttendanceStatus.CHECKED_IN)
+        
+        message = CHECKIN_SUCCESS_MESSAGE.format(time=current_time, date=current_date)
+        
+        # Send success message with smart keyboard
+        await update.message.reply_text(message, parse_mode='HTML', reply_markup=smart_keyboard)
+        
+        track_attendance_write(update.effective_user.id, spawn_background_task(persist_attendance(
+            update, sheets_service, worker_name, 'checkin', AttendanceStatus.NOT_CHECKED_IN, check_in_time=current_time
+        )))
             
     except Exception as e:
         logger.error(f"Error completing check-in: {e}")
         await update.message.reply_text("❌ Σφάλμα κατά το check-in. Παρακαλώ δοκιμάστε ξανά.")
-        # Clear pending action on error so user can try again
-        user_id = update.effective_user.id
-        pending_actions.pop(user_id, None)
 
 async def complete_checkout(update: Update, context, pending_data: dict, location_result: dict):
     """Complete check-out after location verification"""
     try:
         sheets_service = context.bot_data.get('sheets_service')
-        location_service = context.bot_data.get('location_service')
         worker_name = pending_data['worker_name']
         
-        # Use Greece timezone for check-out time
-        import pytz
-        greece_tz = pytz.timezone('Europe/Athens')
-        current_time = datetime.now(greece_tz).strftime("%H:%M")
+        # Use Greece timezone for check-out time and date (read the clock once)
+        now = datetime.now(GREECE_TZ)
+        current_time, current_date = format_attendance_clock(now)
         
         # Get current attendance status to find check-in time
         attendance_status = await sheets_service.get_worker_attendance_status(worker_name)
         
-        if attendance_status['status'] == 'CHECKED_IN':
+        if attendance_status['status'] == AttendanceStatus.CHECKED_IN:
             # Extract check-in time from current cell
             check_in_time = attendance_status['time']
             
-            # Update attendance sheet with both times
-            success = await sheets_service.update_attendance_cell(
-                sheets_service.get_current_month_sheet_name(),
-                worker_name,
-                check_in_time=check_in_time,
-                check_out_time=current_time
-            )
+            # Answer right away - the sheet is written in the background (reverted and reported if it fails)
+            await store_attendance_status(worker_name, AttendanceStatus.COMPLETE, f"{check_in_time}-{current_time}")
             
-            if success:
-                # Create smart keyboard for completed status
-                smart_keyboard = create_smart_keyboard(worker_name, 'COMPLETE')
-                
-                # Get current date in Greece timezone for display
-                current_date = datetime.now(greece_tz).strftime("%d/%m/%Y")
-                
-                message = f"""
-🚪 **Check-out επιτυχής!**
-
-**Check-in:** {check_in_time}
-**Check-out:** {current_time}
-**Ημερομηνία:** {current_date}
-
-**Η βάρδια σας ολοκληρώθηκε! Μπορείτε να κάνετε check-in αύριο.**
-                """
-                
-                # Send success message with smart keyboard
-                await update.message.reply_text(message, parse_mode='Markdown', reply_markup=smart_keyboard)
-            else:
-                await update.message.reply_text("❌ Σφάλμα κατά το check-out. Παρακαλώ δοκιμάστε ξανά.")
-                # Clear pending action on failure so user can try again
-                user_id = update.effective_user.id
-                pending_actions.pop(user_id, None)
+            # Create smart keyboard for completed status
+            smart_keyboard = create_smart_keyboard(AttendanceStatus.COMPLETE)
+            
+            message = CHECKOUT_SUCCESS_MESSAGE.format(check_in=html.escape(check_in_time), check_out=current_time, date=current_date)
+            
+            # Send success message with smart keyboard
+            await update.message.reply_text(message, parse_mode='HTML', reply_markup=smart_keyboard)
+            
+            track_attendance_write(update.effective_user.id, spawn_background_task(persist_attendance(
+                update, sheets_service, worker_name, 'checkout', AttendanceStatus.CHECKED_IN,
+                check_in_time=check_in_time, check_out_time=current_time
+            )))
         else:
             await update.message.reply_text("❌ Δεν μπορείτε να κάνετε check-out χωρίς να έχετε κάνει check-in.")
-            # Clear pending action when not checked in so user can try again
-            user_id = update.effective_user.id
-            pending_actions.pop(user_id, None)
             
     except Exception as e:
         logger.error(f"Error completing check-out: {e}")
         await update.message.reply_text("❌ Σφάλμα κατά το check-out. Παρακαλώ δοκιμάστε ξανά.")
-        # Clear pending action on error so user can try again
-        user_id = update.effective_user.id
-        pending_actions.pop(user_id, None)
 
 async def handle_persistent_keyboard(update: Update, context):
     """Handle persistent keyboard button presses"""
@@ -741,14 +1096,11 @@ async def handle_persistent_keyboard(update: Update, context):
         user = update.effective_user
         text = update.message.text
         
-        logger.info(f"🔍 DEBUG: handle_persistent_keyboard called by user {user.id}")
-        logger.info(f"🔍 DEBUG: Button text: '{text}'")
-        logger.info(f"🔍 DEBUG: User info: {user.username} ({user.first_name} {user.last_name})")
+        logger.debug("🔍 handle_persistent_keyboard called by user %s (%s) - button text: '%s'", user.id, user.username, text)
         
         # Check if worker exists
         sheets_service = context.bot_data.get('sheets_service')
-        location_service = context.bot_data.get('location_service')
-        existing_worker = await sheets_service.find_worker_by_telegram_id(user.id)
+        existing_worker = await cached_find_worker(sheets_service, user.id)
         
         if not existing_worker:
             await update.message.reply_text("❌ Δεν είστε εγγεγραμμένος στο σύστημα. Παρακαλώ χρησιμοποιήστε /start για εγγραφή.")
@@ -756,341 +1108,136 @@ async def handle_persistent_keyboard(update: Update, context):
         
         worker_name = existing_worker['name']
         
-        if text == "✅ Check In":
-            # Handle check-in via persistent keyboard
-            logger.info(f"🔍 DEBUG: Check In button pressed by user {user.id} ({worker_name})")
-            await handle_persistent_checkin(update, context, worker_name)
-            
-        elif text == "🚪 Check Out":
-            # Handle check-out via persistent keyboard
-            logger.info(f"🔍 DEBUG: Check Out button pressed by user {user.id} ({worker_name})")
-            await handle_persistent_checkout(update, context, worker_name)
-            
-        elif text == "📅 Πρόγραμμα":
-            # Handle schedule request via persistent keyboard
-            await handle_persistent_schedule(update, context, worker_name)
-            
-        elif text == "📞 Contact":
-            # Handle contact request via persistent keyboard
-            await handle_persistent_contact(update, context, worker_name)
-            
-        elif text == "🏠 Πίσω στο μενού":
-            # Handle back to menu button - return to main menu
-            await return_to_main_menu(update, context, user.id)
+        handler = PERSISTENT_KEYBOARD_ROUTES.get(text)
+        if handler:
+            logger.debug("🔍 '%s' button pressed by user %s (%s)", text, user.id, worker_name)
+            await handler(update, context, worker_name)
             
     except Exception as e:
         logger.error(f"Error handling persistent keyboard: {e}")
         await update.message.reply_text("❌ Σφάλμα κατά την επεξεργασία της ενέργειας.")
 
-async def handle_persistent_checkin(update: Update, context, worker_name: str):
-    """Handle check-in from persistent keyboard"""
+# Attendance action -> (icon, label) used in the location request messages
+ATTENDANCE_ACTIONS = {
+    'checkin': ("📍", "Check-in"),
+    'checkout': ("🚪", "Check-out"),
+}
+
+async def handle_attendance_request(update: Update, context, worker_name: str, action: str):
+    """Handle check-in/check-out from persistent keyboard - validates status, then asks for location"""
+    icon, label = ATTENDANCE_ACTIONS[action]
+    user_id = update.effective_user.id
     try:
-        # Show loading message immediately
-        loading_msg = await update.message.reply_text("⏳ **Επεξεργασία...**\n\nΠαρακαλώ περιμένετε...")
-        
         # Get sheets service
         sheets_service = context.bot_data.get('sheets_service')
         if not sheets_service:
-            await loading_msg.edit_text("❌ Σφάλμα: Δεν είναι διαθέσιμη η υπηρεσία Google Sheets.")
+            await update.message.reply_text("❌ Σφάλμα: Δεν είναι διαθέσιμη η υπηρεσία Google Sheets.")
             return
         
-        # Check current attendance status from Google Sheets (not memory)
-        attendance_status = await sheets_service.get_worker_attendance_status(worker_name)
+        # A check-in/out still being saved decides the current status - wait for it
+        await wait_for_attendance_write(user_id)
+        
+        # Check current attendance status (cache is invalidated on every check-in/out write)
+        attendance_status = await cached_attendance_status(sheets_service, worker_name)
         current_status = attendance_status['status']
         
         # If already checked in today, show current status
-        if current_status == 'CHECKED_IN':
+        if action == 'checkin' and current_status == AttendanceStatus.CHECKED_IN:
             check_in_time = attendance_status['time']
-            await loading_msg.edit_text(
-                f"✅ **Έχετε ήδη κάνει check-in σήμερα!**\n\n"
-                f"**Ώρα check-in:** {check_in_time}\n\n"
-                f"**Επόμενη ενέργεια:** Πατήστε 🚪 Check Out όταν τελειώσετε τη βάρδια.",
-                parse_mode='Markdown'
+            await update.message.reply_text(
+                ALREADY_CHECKED_IN_MESSAGE.format(time=html.escape(check_in_time)),
+                parse_mode='HTML'
             )
             return
         
-        # If already completed today, show completion status
-        elif current_status == 'COMPLETE':
-            check_in_time = attendance_status['time']
-            if '-' in check_in_time:
-                check_in, check_out = check_in_time.split('-')
-                await loading_msg.edit_text(
-                    f"🎉 **Η βάρδια σας ολοκληρώθηκε!**\n\n"
-                    f"**Check-in:** {check_in}\n"
-                    f"**Check-out:** {check_out}\n\n"
-                    f"**Επόμενη ενέργεια:** Μπορείτε να κάνετε check-in αύριο.",
-                    parse_mode='Markdown'
-                )
-            else:
-                await loading_msg.edit_text(
-                    f"🎉 **Η βάρδια σας ολοκληρώθηκε!**\n\n"
-                    f"**Ώρα:** {check_in_time}\n\n"
-                    f"**Επόμενη ενέργεια:** Μπορείτε να κάνετε check-in αύριο.",
-                    parse_mode='Markdown'
-                )
-            return
-        
-        # No need to check pending_actions - we use Google Sheets data instead
-        
-        # Get user ID for pending actions
-        user_id = update.effective_user.id
-        
-        # Store check-in request in global pending_actions (for location verification)
-        import pytz
-        greece_tz = pytz.timezone('Europe/Athens')
-        pending_actions[user_id] = {
-            'worker_name': worker_name,
-            'action': 'checkin',
-            'timestamp': datetime.now(greece_tz)
-        }
-        
-        # Create location request keyboard (immediate request)
-        location_keyboard = ReplyKeyboardMarkup([
-            [KeyboardButton("📍 Στείλε την τοποθεσία μου", request_location=True)],
-            [KeyboardButton("🏠 Πίσω στο μενού")]
-        ], resize_keyboard=True, one_time_keyboard=True)
-        
-        # Show immediate location request message (send new message for keyboard)
-        await loading_msg.edit_text(
-            f"📍 **Check-in για {worker_name}**\n\n"
-            "**Στείλτε την τοποθεσία σας τώρα:**\n\n"
-            "⚠️ Πρέπει να είστε μέσα σε 300m από το γραφείο",
-            parse_mode='Markdown'
-        )
-        
-        # Send location keyboard in a separate message
-        await update.message.reply_text(
-            "**Πατήστε το κουμπί παρακάτω για να στείλετε την τοποθεσία σας:**",
-            reply_markup=location_keyboard,
-            parse_mode='Markdown'
-        )
-        
-    except Exception as e:
-        logger.error(f"Error during persistent check-in: {e}")
-        await update.message.reply_text("❌ Σφάλμα κατά το check-in. Παρακαλώ δοκιμάστε ξανά.")
-
-async def handle_persistent_checkout(update: Update, context, worker_name: str):
-    """Handle check-out from persistent keyboard"""
-    try:
-        # Show loading message immediately
-        loading_msg = await update.message.reply_text("⏳ **Επεξεργασία...**\n\nΠαρακαλώ περιμένετε...")
-        
-        # Get sheets service
-        sheets_service = context.bot_data.get('sheets_service')
-        if not sheets_service:
-            await loading_msg.edit_text("❌ Σφάλμα: Δεν είναι διαθέσιμη η υπηρεσία Google Sheets.")
-            return
-        
-        # Check current attendance status from Google Sheets (not memory)
-        attendance_status = await sheets_service.get_worker_attendance_status(worker_name)
-        current_status = attendance_status['status']
-        
         # If not checked in today, can't check out
-        if current_status == 'NOT_CHECKED_IN':
-            await loading_msg.edit_text(
-                f"❌ **Δεν μπορείτε να κάνετε check-out!**\n\n"
-                f"**Πρέπει πρώτα να κάνετε check-in.**\n\n"
-                f"**Επόμενη ενέργεια:** Πατήστε ✅ Check In για να ξεκινήσετε τη βάρδια.",
-                parse_mode='Markdown'
-            )
+        if action == 'checkout' and current_status == AttendanceStatus.NOT_CHECKED_IN:
+            await update.message.reply_text(NOT_CHECKED_IN_MESSAGE, parse_mode='HTML')
             return
         
         # If already completed today, show completion status
-        elif current_status == 'COMPLETE':
+        if current_status == AttendanceStatus.COMPLETE:
             check_in_time = attendance_status['time']
             if '-' in check_in_time:
                 check_in, check_out = check_in_time.split('-')
-                await loading_msg.edit_text(
-                    f"🎉 **Η βάρδια σας ολοκληρώθηκε!**\n\n"
-                    f"**Check-in:** {check_in}\n"
-                    f"**Check-out:** {check_out}\n\n"
-                    f"**Επόμενη ενέργεια:** Μπορείτε να κάνετε check-in αύριο.",
-                    parse_mode='Markdown'
+                await update.message.reply_text(
+                    SHIFT_COMPLETE_MESSAGE.format(check_in=html.escape(check_in), check_out=html.escape(check_out)),
+                    parse_mode='HTML'
                 )
             else:
-                await loading_msg.edit_text(
-                    f"🎉 **Η βάρδια σας ολοκληρώθηκε!**\n\n"
-                    f"**Ώρα:** {check_in_time}\n\n"
-                    f"**Επόμενη ενέργεια:** Μπορείτε να κάνετε check-in αύριο.",
-                    parse_mode='Markdown'
+                await update.message.reply_text(
+                    SHIFT_COMPLETE_TIME_MESSAGE.format(time=html.escape(check_in_time)),
+                    parse_mode='HTML'
                 )
             return
         
-        # Check if user has a pending action (for active check-out flow)
-        user_id = update.effective_user.id
-        if user_id in pending_actions:
-            existing_action = pending_actions[user_id]
-            if existing_action['action'] == 'checkout':
-                # Already in check-out flow - send location keyboard again
-                location_keyboard = ReplyKeyboardMarkup([
-                    [KeyboardButton("📍 Στείλε την τοποθεσία μου", request_location=True)],
-                    [KeyboardButton("🏠 Πίσω στο μενού")]
-                ], resize_keyboard=True, one_time_keyboard=True)
-                
-                await loading_msg.edit_text(
-                    f"⏳ **Check-out σε εξέλιξη για {worker_name}**\n\n"
-                    "**📱 Στείλτε την τοποθεσία σας** με το κουμπί παρακάτω:\n\n"
-                    "⚠️ Πρέπει να είστε μέσα σε 300m από το γραφείο",
-                    reply_markup=location_keyboard,
-                    parse_mode='Markdown'
+        # A pending action means this press is a duplicate (updates from one chat run one at a time,
+        # so the earlier press has already stored it) - don't start a second flow
+        existing_action = pending_actions.get(user_id)
+        if existing_action:
+            if existing_action['action'] == action:
+                # Already in this flow - send location keyboard again
+                logger.info(f"⏭️ Duplicate {label.lower()} press from user {user_id}")
+                await update.message.reply_text(
+                    ATTENDANCE_IN_PROGRESS_MESSAGE.format(label=label, name=html.escape(worker_name)),
+                    reply_markup=LOCATION_REQUEST_KEYBOARD,
+                    parse_mode='HTML'
                 )
                 return
             elif existing_action['action'] == 'checkin':
-                await loading_msg.edit_text(
-                    f"⚠️ **Έχετε ήδη ένα check-in σε εξέλιξη**\n\n"
-                    "**🔄 Περιμένετε να ολοκληρωθεί το check-in πριν κάνετε check-out.**",
-                    parse_mode='Markdown'
-                )
+                await update.message.reply_text(CHECKIN_IN_PROGRESS_MESSAGE, parse_mode='HTML')
                 return
         
-        # Store check-out request in global pending_actions
-        import pytz
-        greece_tz = pytz.timezone('Europe/Athens')
-        pending_actions[user_id] = {
+        # Store request in global pending_actions (for location verification)
+        pending_actions.put(user_id, {
             'worker_name': worker_name,
-            'action': 'checkout',
-            'timestamp': datetime.now(greece_tz)
-        }
+            'action': action,
+            'timestamp': datetime.now(GREECE_TZ)
+        })
         
-        # Create location request keyboard (immediate request)
-        location_keyboard = ReplyKeyboardMarkup([
-            [KeyboardButton("📍 Στείλε την τοποθεσία μου", request_location=True)],
-            [KeyboardButton("🏠 Πίσω στο μενού")]
-        ], resize_keyboard=True, one_time_keyboard=True)
-        
-        # Show immediate location request message (send new message for keyboard)
-        await loading_msg.edit_text(
-            f"🚪 **Check-out για {worker_name}**\n\n"
-            "**Στείλτε την τοποθεσία σας τώρα:**\n\n"
-            "⚠️ Πρέπει να είστε μέσα σε 300m από το γραφείο",
-            parse_mode='Markdown'
-        )
-        
-        # Send location keyboard in a separate message
+        # Location request and keyboard go out in a single message
         await update.message.reply_text(
-            "**Πατήστε το κουμπί παρακάτω για να στείλετε την τοποθεσία σας:**",
-            reply_markup=location_keyboard,
-            parse_mode='Markdown'
+            LOCATION_REQUEST_MESSAGE.format(icon=icon, label=label, name=html.escape(worker_name)),
+            reply_markup=LOCATION_REQUEST_KEYBOARD,
+            parse_mode='HTML'
         )
         
     except Exception as e:
-        logger.error(f"Error during persistent check-out: {e}")
-        await update.message.reply_text("❌ Σφάλμα κατά το check-out. Παρακαλώ δοκιμάστε ξανά.")
+        logger.error(f"Error during persistent {label.lower()}: {e}")
+        await update.message.reply_text(f"❌ Σφάλμα κατά το {label.lower()}. Παρακαλώ δοκιμάστε ξανά.")
+
+async def handle_persistent_checkin(update: Update, context, worker_name: str):
+    """Handle check-in from persistent keyboard"""
+    await handle_attendance_request(update, context, worker_name, 'checkin')
+
+async def handle_persistent_checkout(update: Update, context, worker_name: str):
+    """Handle check-out from persistent keyboard"""
+    await handle_attendance_request(update, context, worker_name, 'checkout')
 
 async def handle_persistent_schedule(update: Update, context, worker_name: str):
     """Handle weekly schedule request from persistent keyboard"""
     try:
-        from datetime import datetime, timedelta
-        
         # Get current date and format for sheets (Greece timezone)
-        import pytz
-        greece_tz = pytz.timezone('Europe/Athens')
-        today = datetime.now(greece_tz)
-        # Fix date format for macOS compatibility
-        try:
-            current_date = today.strftime("%-m/%-d/%Y")  # Format: 7/18/2025
-        except ValueError:
-            current_date = today.strftime("%m/%d/%Y")  # Format: 07/18/2025
-        
-        # Get worker's telegram ID to find their schedule
-        user = update.effective_user
+        today = datetime.now(GREECE_TZ)
+        current_date = format_sheet_date(today)
         
         # Get sheets_service from the bot context
         sheets_service = context.bot_data.get('sheets_service')
         if not sheets_service:
             await update.message.reply_text("❌ Σφάλμα: Δεν είναι διαθέσιμη η υπηρεσία Google Sheets.")
             return
-            
-        existing_worker = await sheets_service.find_worker_by_telegram_id(user.id)
-        
-        if not existing_worker:
-            await update.message.reply_text("❌ Δεν είστε εγγεγραμμένος στο σύστημα.")
-            return
-        
-        # Get current week schedule
-        current_week_schedule = await sheets_service.get_weekly_schedule(str(user.id), current_date)
         
-        # Get next week schedule using intelligent B3-based detection
-        worker_name = existing_worker['name']
-        next_week_schedule = await sheets_service.get_intelligent_next_week_schedule(current_date, worker_name)
+        # Current and next week (B3-based detection) plus today's status in a single batchGet
+        current_week_schedule, next_week_schedule, attendance_status = await cached_schedules_and_attendance(sheets_service, worker_name, current_date)
         
         # Create smart keyboard based on current status
-        attendance_status = await sheets_service.get_worker_attendance_status(worker_name)
         current_status = attendance_status['status']
-        smart_keyboard = create_smart_keyboard(worker_name, current_status)
-        
-        # Format current week schedule with improved design
-        current_week_text = ""
-        if current_week_schedule:
-            current_week_text = "**📅 ΤΡΕΧΟΥΣΑ ΕΒΔΟΜΑΔΑ**\n"
-            current_week_text += "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-            
-            days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            day_names_gr = ['Δευτέρα', 'Τρίτη', 'Τετάρτη', 'Πέμπτη', 'Παρασκευή', 'Σάββατο', 'Κυριακή']
-            
-            for i, day in enumerate(days):
-                # Always show all 7 days, regardless of data availability
-                if day in current_week_schedule and current_week_schedule[day]:
-                    schedule = current_week_schedule[day]
-                    if schedule and schedule.strip():
-                        if schedule.strip().upper() in ['REST', 'OFF']:
-                            current_week_text += f"🟡 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• {schedule}\n"
-                        else:
-                            # Check if it's today
-                            today_name = today.strftime("%A")
-                            if day == today_name:
-                                current_week_text += f"🎯 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• {schedule} _(Σήμερα)_\n"
-                            else:
-                                current_week_text += f"🟢 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• {schedule}\n"
-                    else:
-                        # Empty slots are treated as REST days
-                        current_week_text += f"🟡 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• REST\n"
-                else:
-                    # Day not in schedule or has no data = REST day
-                    current_week_text += f"🟡 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• REST\n"
-        else:
-            current_week_text = "**📅 ΤΡΕΧΟΥΣΑ ΕΒΔΟΜΑΔΑ**\n"
-            current_week_text += "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-            current_week_text += "⚠️ Δεν βρέθηκε πρόγραμμα"
-        
-        # Format next week schedule with improved design
-        next_week_text = ""
-        if next_week_schedule:
-            next_week_text = "\n**📅 ΕΠΟΜΕΝΗ ΕΒΔΟΜΑΔΑ**\n"
-            next_week_text += "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-            
-            days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            day_names_gr = ['Δευτέρα', 'Τρίτη', 'Τετάρτη', 'Πέμπτη', 'Παρασκευή', 'Σάββατο', 'Κυριακή']
-            
-            for i, day in enumerate(days):
-                # Always show all 7 days, regardless of data availability
-                if day in next_week_schedule and next_week_schedule[day]:
-                    schedule = next_week_schedule[day]
-                    if schedule and schedule.strip():
-                        if schedule.strip().upper() in ['REST', 'OFF']:
-                            next_week_text += f"🟡 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• {schedule}\n"
-                        else:
-                            next_week_text += f"🟢 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• {schedule}\n"
-                    else:
-                        # Empty slots are treated as REST days
-                        next_week_text += f"🟡 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• REST\n"
-                else:
-                    # Day not in schedule or has no data = REST day
-                    next_week_text += f"🟡 **{day_names_gr[i]}**{' ' * (12 - len(day_names_gr[i]))}• REST\n"
-        else:
-            next_week_text = "\n**📅 ΕΠΟΜΕΝΗ ΕΒΔΟΜΑΔΑ**\n"
-            next_week_text += "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-            next_week_text += "⚪ Δεν έχει οριστεί ακόμα"
+        smart_keyboard = create_smart_keyboard(current_status)
         
-        message = f"""
-{current_week_text}
-{next_week_text}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-**Επιλέξτε την επόμενη ενέργεια:**
-        """
+        # Format both weeks with improved design
+        message = render_schedule_message(current_week_schedule, next_week_schedule, today.strftime("%A"))
         
-        await update.message.reply_text(message, parse_mode='Markdown', reply_markup=smart_keyboard)
+        await update.message.reply_text(message, parse_mode='HTML', reply_markup=smart_keyboard)
         
     except Exception as e:
         logger.error(f"Error during persistent schedule request: {e}")
@@ -1102,46 +1249,33 @@ async def handle_persistent_contact(update: Update, context, worker_name: str):
         user = update.effective_user
         
         # Check if user is admin (you)
-        if user.username == "DenisZgl" or user.id == 123456789:  # Replace with your actual Telegram ID
+        if is_admin(user):
             # Admin sees different message
-            admin_message = f"""
-👨‍💻 **Admin Panel - {worker_name}**
-
-**Είστε ο admin του bot!**
-
-**📊 Διαθέσιμες ενέργειες:**
-- /workers - Λίστα εργαζομένων
-- /office - Πληροφορίες γραφείου  
-- /monthcreation - Δημιουργία μηνιαίων φύλλων
-- /attendance - Σημερινή παρουσία (admin only)
-
-**ℹ️ Για επικοινωνία με εργαζόμενους:**
-Χρησιμοποιήστε τα admin commands παραπάνω.
-
-**🔧 Quick Actions:**
-- Πατήστε /workers για να δείτε όλους τους εργαζόμενους
-- Πατήστε /attendance για σημερινή παρουσία
-- Πατήστε /office για πληροφορίες γραφείου
-            """
-            await update.message.reply_text(admin_message, parse_mode='Markdown')
+            admin_message = ADMIN_PANEL_MESSAGE.format(name=html.escape(worker_name))
+            await update.message.reply_text(admin_message, parse_mode='HTML')
         else:
             # Regular users get contact button
-            contact_keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("💬 Chat με Admin", url="https://t.me/DenisZgl")]
-            ])
-            
-            contact_message = f"""
-💬 **Άμεση Επικοινωνία**
-
-**Πατήστε το κουμπί για άμεση επικοινωνία:**
-            """
-            
-            await update.message.reply_text(contact_message, parse_mode='Markdown', reply_markup=contact_keyboard)
+            await update.message.reply_text(CONTACT_MESSAGE, parse_mode='HTML', reply_markup=CONTACT_ADMIN_KEYBOARD)
         
     except Exception as e:
         logger.error(f"Error during persistent contact request: {e}")
         await update.message.reply_text("❌ Σφάλμα κατά την επεξεργασία της επικοινωνίας.")
 
+async def handle_persistent_back(update: Update, context, worker_name: str):
+    """Handle back to menu button - return to main menu"""
+    await return_to_main_menu(update, context, update.effective_user.id, worker_name)
+
+# Persistent keyboard button text -> handler(update, context, worker_name)
+PERSISTENT_KEYBOARD_ROUTES = {
+    "✅ Check In": handle_persistent_checkin,
+    "🚪 Check Out": handle_persistent_checkout,
+    "📅 Πρόγραμμα": handle_persistent_schedule,
+    # Label used by MAIN_MENU_KEYBOARD
+    "📅 My Schedule": handle_persistent_schedule,
+    "📞 Contact": handle_persistent_contact,
+    "🏠 Πίσω στο μενού": handle_persistent_back,
+}
+
 # OLD AUTOMATIC MONTHLY SHEET CREATION - REPLACED BY MANUAL /monthcreation COMMAND
 # async def check_and_create_monthly_sheets():
 #     """Check if new month started and create sheet automatically - runs once per day"""
@@ -1210,6 +1344,17 @@ async def handle_persistent_contact(update: Update, context, worker_name: str):
 #     except Exception as e:
 #             logger.error(f"❌ Error in monthly sheet check: {e}")
 
+async def setup_and_style_monthly_sheet(sheets_service, sheet_name: str, sheet_id: int = None) -> bool:
+    """Set up headers and styling for a newly created monthly sheet"""
+    headers_success = await sheets_service.setup_monthly_sheet_headers(sheet_name)
+    if not headers_success:
+        logger.error(f"❌ Failed to set up headers for {sheet_name}")
+        return False
+    
+    await sheets_service.style_monthly_sheet(sheet_name, sheet_id)
+    logger.info(f"✅ Created monthly sheet: {sheet_name}")
+    return True
+
 async def create_next_two_months_sheets(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Admin command to create current and next 2 months sheets if they don't exist"""
     try:
@@ -1218,168 +1363,55 @@ async def create_next_two_months_sheets(update: Update, context: ContextTypes.DE
         logger.info(f"👤 User {user.username} ({user.id}) requested month creation")
         
         # Use Greece timezone for month creation
-        import pytz
-        greece_tz = pytz.timezone('Europe/Athens')
-        current_time = datetime.now(greece_tz)
+        current_time = datetime.now(GREECE_TZ)
         
-        # Get current month and next 2 months
-        current_month_name = f"{current_time.month:02d}_{current_time.year}"
-        next_month = current_time + timedelta(days=32)
-        next_next_month = next_month + timedelta(days=32)
-        
-        next_month_name = f"{next_month.month:02d}_{next_month.year}"
-        next_next_month_name = f"{next_next_month.month:02d}_{next_next_month.year}"
+        # Current month and next 2 months as MM_YYYY (month arithmetic, so no month is skipped)
+        month_index = current_time.year * 12 + current_time.month - 1
+        month_names = [f"{(month_index + offset) % 12 + 1:02d}_{(month_index + offset) // 12}" for offset in range(3)]
         
         await update.message.reply_text(f"🔄 Checking and creating monthly sheets...")
         
-        created_sheets = []
+        sheets_service = context.bot_data['sheets_service']
         
         try:
-            result = sheets_service.service.spreadsheets().get(
-                spreadsheetId=sheets_service.spreadsheet_id
-            ).execute()
+            # Existing sheet titles (cached spreadsheet metadata, kept current by the service on addSheet)
+            existing_sheets = set(await sheets_service.get_sheet_ids())
+            missing_months = [name for name in month_names if name not in existing_sheets]
+            new_sheet_ids = {}
             
-            # Check and create current month
-            current_month_exists = any(sheet['properties']['title'] == current_month_name 
-                                     for sheet in result.get('sheets', []))
+            for name in month_names:
+                if name in existing_sheets:
+                    logger.info(f"✅ Monthly sheet {name} already exists")
             
-            if not current_month_exists:
-                logger.info(f"🔄 Creating current month sheet: {current_month_name}")
+            if missing_months:
+                logger.info(f"🔄 Creating monthly sheets: {', '.join(missing_months)}")
                 
                 try:
-                    # Create new sheet
-                    request = {
-                        'addSheet': {
-                            'properties': {
-                                'title': current_month_name,
-                                'gridProperties': {
-                                    'rowCount': 1000,
-                                    'columnCount': 32  # 31 days + name column
-                                }
-                            }
-                        }
-                    }
+                    # Create all missing sheets in a single batchUpdate
+                    requests = [sheets_service.monthly_sheet_request(name) for name in missing_months]
                     
-                    sheets_service.service.spreadsheets().batchUpdate(
+                    reply = await sheets_service.execute_async(sheets_service.service.spreadsheets().batchUpdate(
                         spreadsheetId=sheets_service.spreadsheet_id,
-                        body={'requests': [request]}
-                    ).execute()
-                    
-                    # Set up headers and styling
-                    headers_success = await sheets_service.setup_monthly_sheet_headers(current_month_name)
-                    if not headers_success:
-                        logger.error(f"❌ Failed to set up headers for {current_month_name}")
-                        await update.message.reply_text(f"❌ Failed to create {current_month_name} - headers setup failed")
-                        return
+                        body={'requests': requests}
+                    ))
                     
-                    # Verify headers were created correctly
-                    await asyncio.sleep(1)
-                    await sheets_service.style_monthly_sheet(current_month_name)
-                    
-                    created_sheets.append(current_month_name)
-                    logger.info(f"✅ Created current month sheet: {current_month_name}")
-                    
-                    # Add delay between month creations to avoid rate limiting
-                    await asyncio.sleep(2)
+                    # The reply carries the new sheet IDs - styling doesn't need to look them up again
+                    new_sheet_ids = sheets_service.remember_added_sheets(reply)
                 except Exception as e:
-                    logger.error(f"❌ Failed to create current month sheet {current_month_name}: {e}")
-                    await update.message.reply_text(f"❌ Failed to create {current_month_name}: {e}")
+                    logger.error(f"❌ Failed to create monthly sheets {', '.join(missing_months)}: {e}")
+                    await update.message.reply_text(f"❌ Failed to create {', '.join(missing_months)}: {e}")
                     return
-            else:
-                logger.info(f"✅ Current month sheet {current_month_name} already exists")
-            
-            # Check and create next month
-            next_month_exists = any(sheet['properties']['title'] == next_month_name 
-                                  for sheet in result.get('sheets', []))
             
-            if not next_month_exists:
-                logger.info(f"🔄 Creating next month sheet: {next_month_name}")
-                
-                try:
-                    # Create new sheet
-                    request = {
-                        'addSheet': {
-                            'properties': {
-                                'title': next_month_name,
-                                'gridProperties': {
-                                    'rowCount': 1000,
-                                    'columnCount': 32  # 31 days + name column
-                                }
-                            }
-                        }
-                    }
-                    
-                    sheets_service.service.spreadsheets().batchUpdate(
-                        spreadsheetId=sheets_service.spreadsheet_id,
-                        body={'requests': [request]}
-                    ).execute()
-                    
-                    # Set up headers and styling
-                    headers_success = await sheets_service.setup_monthly_sheet_headers(next_month_name)
-                    if not headers_success:
-                        logger.error(f"❌ Failed to set up headers for {next_month_name}")
-                        await update.message.reply_text(f"❌ Failed to create {next_month_name} - headers setup failed")
-                        return
-                    
-                    await asyncio.sleep(1)
-                    await sheets_service.style_monthly_sheet(next_month_name)
-                    
-                    created_sheets.append(next_month_name)
-                    logger.info(f"✅ Created next month sheet: {next_month_name}")
-                    
-                    # Add delay between month creations to avoid rate limiting
-                    await asyncio.sleep(2)
-                except Exception as e:
-                    logger.error(f"❌ Failed to create next month sheet {next_month_name}: {e}")
-                    await update.message.reply_text(f"❌ Failed to create {next_month_name}: {e}")
-                    return
-            else:
-                logger.info(f"✅ Next month sheet {next_month_name} already exists")
-            
-            # Check and create next next month
-            next_next_month_exists = any(sheet['properties']['title'] == next_next_month_name 
-                                       for sheet in result.get('sheets', []))
+            # Set up headers and styling for all new months concurrently (rate limits are retried in the service)
+            results = await asyncio.gather(*[
+                setup_and_style_monthly_sheet(sheets_service, name, new_sheet_ids.get(name)) for name in missing_months
+            ])
+            created_sheets = [name for name, success in zip(missing_months, results) if success]
+            failed_sheets = [name for name, success in zip(missing_months, results) if not success]
             
-            if not next_next_month_exists:
-                logger.info(f"🔄 Creating next next month sheet: {next_next_month_name}")
-                
-                try:
-                    # Create new sheet
-                    request = {
-                        'addSheet': {
-                            'properties': {
-                                'title': next_next_month_name,
-                                'gridProperties': {
-                                    'rowCount': 1000,
-                                    'columnCount': 32  # 31 days + name column
-                                }
-                            }
-                        }
-                    }
-                    
-                    sheets_service.service.spreadsheets().batchUpdate(
-                        spreadsheetId=sheets_service.spreadsheet_id,
-                        body={'requests': [request]}
-                    ).execute()
-                    
-                    # Set up headers and styling
-                    headers_success = await sheets_service.setup_monthly_sheet_headers(next_next_month_name)
-                    if not headers_success:
-                        logger.error(f"❌ Failed to set up headers for {next_next_month_name}")
-                        await update.message.reply_text(f"❌ Failed to create {next_next_month_name} - headers setup failed")
-                        return
-                    
-                    await asyncio.sleep(1)
-                    await sheets_service.style_monthly_sheet(next_next_month_name)
-                    
-                    created_sheets.append(next_next_month_name)
-                    logger.info(f"✅ Created next next month sheet: {next_next_month_name}")
-                except Exception as e:
-                    logger.error(f"❌ Failed to create next next month sheet {next_next_month_name}: {e}")
-                    await update.message.reply_text(f"❌ Failed to create {next_next_month_name}: {e}")
-                    return
-            else:
-                logger.info(f"✅ Next next month sheet {next_next_month_name} already exists")
+            if failed_sheets:
+                await update.message.reply_text(f"❌ Failed to create {', '.join(failed_sheets)} - headers setup failed")
+                return
                 
         except Exception as e:
             logger.error(f"❌ Error creating monthly sheets: {e}")
@@ -1396,78 +1428,90 @@ async def create_next_two_months_sheets(update: Update, context: ContextTypes.DE
         else:
             await update.message.reply_text(
                 f"ℹ️ All monthly sheets already exist:\n" +
-                f"📅 {current_month_name}, {next_month_name}, and {next_next_month_name}"
+                f"📅 {month_names[0]}, {month_names[1]}, and {month_names[2]}"
             )
             
     except Exception as e:
         logger.error(f"❌ Error in month creation command: {e}")
         await update.message.reply_text(f"❌ Error: {e}")
 
-async def periodic_monthly_check(context: ContextTypes.DEFAULT_TYPE):
-    """Periodic task to check and create monthly sheets - runs once per day"""
-    # This function is no longer needed as monthly sheet creation is manual
-    # await check_and_create_monthly_sheets()
-    pass
-
-async def webhook_handler(request):
-    """Handle incoming webhook requests from Telegram with improved error handling"""
-    try:
-        # Add timeout protection
-        async with asyncio.timeout(30):  # 30 second timeout
+def make_webhook_handler(application):
+    """Build the webhook endpoint with the application and bot bound once (no per-request app lookups)"""
+    bot = application.bot
+    update_queue = application.update_queue
+    
+    async def webhook_handler(request):
+        """Handle incoming webhook requests from Telegram with improved error handling"""
+        try:
+            # Add timeout protection
+            async with asyncio.timeout(30):  # 30 second timeout
             
-            # Get the update from Telegram
-            try:
-                update_data = await request.json()
-            except Exception as e:
-                logger.error(f"Failed to parse webhook JSON: {e}")
-                return web.Response(text='Invalid JSON', status=400)
+                # Reject requests that don't carry the webhook secret before reading the body
+                if WEBHOOK_SECRET and not hmac.compare_digest(request.headers.get('X-Telegram-Bot-Api-Secret-Token', '').encode(), WEBHOOK_SECRET.encode()):
+                    logger.warning("Rejected webhook request with a missing or wrong secret token")
+                    return web.Response(text='Unauthorized', status=401)
             
-            # Validate update data
-            if not update_data or 'update_id' not in update_data:
-                logger.error("Invalid update data received")
-                return web.Response(text='Invalid update data', status=400)
+                # Get the update from Telegram (ujson's C decoder instead of stdlib json)
+                try:
+                    update_data = ujson.loads(await request.read())
+                except ujson.JSONDecodeError as e:
+                    logger.error("Failed to parse webhook JSON: %s", e)
+                    return web.Response(text='Invalid JSON', status=400)
             
-            # Process the update
-            try:
-                update = Update.de_json(update_data, request.app['bot'])
-                await request.app['application'].process_update(update)
-                logger.debug(f"✅ Processed update {update.update_id}")
-            except Exception as e:
-                logger.error(f"Error processing update {update_data.get('update_id', 'unknown')}: {e}")
-                # Don't return error to Telegram to avoid retries
-                return web.Response(text='OK')
+                # Validate update data (valid JSON that isn't an object is rejected too)
+                if not isinstance(update_data, dict) or 'update_id' not in update_data:
+                    logger.error("Invalid update data received")
+                    return web.Response(text='Invalid update data', status=400)
+            
+                # Answer Telegram right away - the application processes the queue in the background
+                # (per-chat ordering via ChatOrderedUpdateProcessor), so slow Sheets calls never hold
+                # the webhook connection open and trigger retries
+                try:
+                    update = Update.de_json(update_data, bot)
+                    update_queue.put_nowait(update)
+                except asyncio.QueueFull:
+                    # Backlog is full - answer at once and let Telegram redeliver later instead of holding the connection
+                    logger.warning("Update queue full, asking Telegram to retry update %s", update_data['update_id'])
+                    return web.Response(text='Busy', status=503)
+                except Exception as e:
+                    logger.error("Error processing update %s: %s", update_data.get('update_id', 'unknown'), e)
+                    # Don't return error to Telegram to avoid retries
+                    return web.Response(text='OK')
             
-            return web.Response(text='OK')
+                return web.Response(text='OK')
             
-    except asyncio.TimeoutError:
-        logger.error("Webhook request timed out after 30 seconds")
-        return web.Response(text='Request timeout', status=408)
-    except Exception as e:
-        logger.error(f"Unexpected error in webhook handler: {e}")
-        return web.Response(text='Internal server error', status=500)
+        except asyncio.TimeoutError:
+            logger.error("Webhook request timed out after 30 seconds")
+            return web.Response(text='Request timeout', status=408)
+        except Exception as e:
+            logger.error("Unexpected error in webhook handler: %s", e)
+            return web.Response(text='Internal server error', status=500)
+    
+    return webhook_handler
+
+async def liveness_probe(request):
+    """Plain liveness probe for / - no metrics collected"""
+    return web.Response(body=LIVENESS_BODY, content_type='text/plain')
 
 async def health_check(request):
     """Health check endpoint for Render.com with system metrics"""
     try:
-        # Get basic system info
+        # Get basic system info (CPU usage since the previous probe - never sleeps on the event loop)
         memory = psutil.virtual_memory()
-        cpu = psutil.cpu_percent(interval=0.1)
+        cpu = psutil.cpu_percent(interval=None)
         disk = psutil.disk_usage('/')
         
         # Get pending actions count
-        global pending_actions
         pending_count = len(pending_actions)
         
         # Get uptime
-        uptime = time.time() - psutil.boot_time()
+        uptime = time.time() - BOOT_TIME
         
         # Use Greece timezone for health check timestamp
-        import pytz
-        greece_tz = pytz.timezone('Europe/Athens')
         
         health_data = {
             'status': 'healthy',
-            'timestamp': datetime.now(greece_tz).isoformat(),
+            'timestamp': datetime.now(GREECE_TZ).isoformat(),
             'system': {
                 'memory_percent': memory.percent,
                 'cpu_percent': cpu,
@@ -1487,30 +1531,53 @@ async def health_check(request):
         if memory.percent > 95 or cpu > 95 or disk.percent > 95:
             health_data['status'] = 'critical'
         
-        return web.json_response(health_data)
+        return web.json_response(health_data, dumps=ujson.dumps)
         
     except Exception as e:
         logger.error(f"Health check error: {e}")
         return web.json_response({
             'status': 'error',
             'error': str(e),
-            'timestamp': datetime.now(greece_tz).isoformat()
-        }, status=500)
+            'timestamp': datetime.now(GREECE_TZ).isoformat()
+        }, status=500, dumps=ujson.dumps)
 
 async def shutdown_handler(request, shutdown_event):
     """Handle graceful shutdown"""
     try:
         logger.info("🔄 Shutdown request received")
         shutdown_event.set()
-        return web.json_response({'status': 'shutdown_initiated'})
+        return web.json_response({'status': 'shutdown_initiated'}, dumps=ujson.dumps)
     except Exception as e:
         logger.error(f"Shutdown handler error: {e}")
-        return web.json_response({'error': str(e)}, status=500)
+        return web.json_response({'error': str(e)}, status=500, dumps=ujson.dumps)
+
+async def run_polling(app, shutdown_event):
+    """Long-poll for updates on the running loop until shutdown is requested"""
+    await app.updater.start_polling(timeout=POLLING_TIMEOUT, poll_interval=0.0, allowed_updates=ALLOWED_UPDATES, drop_pending_updates=True)
+    logger.info("✅ Bot ready! Polling for updates")
+    await shutdown_event.wait()
+    logger.info("🔄 Shutdown signal received, cleaning up...")
 
 async def main():
     """Main function"""
     # Global shutdown flag
     shutdown_event = asyncio.Event()
+    sheets_service = None
+    runner = None
+    app = None
+    
+    # SIGTERM (Render stopping the service) and SIGINT end the run through the same graceful path
+    def signal_handler(signum):
+        logger.info(f"🔄 Received signal {signum.name}, initiating graceful shutdown...")
+        shutdown_event.set()
+    
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, signal_handler, signum)
+        except NotImplementedError:
+            # Windows event loops don't support signal handlers - Ctrl+C still raises KeyboardInterrupt
+            pass
     
     try:
         # Load configuration
@@ -1518,7 +1585,7 @@ async def main():
         token = config['bot_token']
         
         # Create application with better connection settings and error handling
-        app = Application.builder().token(token).connection_pool_size(1).build()
+        app = Application.builder().token(token).connection_pool_size(BOT_CONNECTION_POOL_SIZE).update_queue(asyncio.Queue(maxsize=UPDATE_QUEUE_SIZE)).concurrent_updates(ChatOrderedUpdateProcessor(CONCURRENT_UPDATES)).rate_limiter(ChatRateLimiter()).build()
         
         # Initialize services (lazy loading - no startup API calls)
         sheets_service = GoogleSheetsService(config['spreadsheet_id'])
@@ -1527,55 +1594,68 @@ async def main():
         # Add services to context
         app.bot_data['sheets_service'] = sheets_service
         app.bot_data['location_service'] = location_service
+        # Office zone is static configuration - resolve it once
+        app.bot_data['office_info'] = location_service.get_office_info()
         
         logger.info("✅ Services initialized (lazy loading enabled)")
         
-        # Add periodic cleanup job (every 15 minutes)
+        # Add expiry sweep (every 5 minutes) and periodic cleanup job (every 15 minutes)
         job_queue = app.job_queue
-        if job_queue:
-            job_queue.run_repeating(periodic_cleanup, interval=900, first=900)
-            logger.info("✅ Periodic cleanup job scheduled")
+        if job_queue is None:
+            # Without a JobQueue registrations never time out and nothing is ever swept
+            raise RuntimeError('JobQueue unavailable - install python-telegram-bot[job-queue]')
+        job_queue.run_repeating(sweep_expired_entries, interval=PENDING_SWEEP_INTERVAL, first=PENDING_SWEEP_INTERVAL)
+        job_queue.run_repeating(periodic_cleanup, interval=900, first=900)
+        logger.info("✅ Periodic cleanup jobs scheduled")
         
         # Add conversation handler for registration
         conv_handler = ConversationHandler(
             entry_points=[CommandHandler("start", start_command)],
             states={
                 ASKING_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_name)],
-                ASKING_PHONE: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_phone)]
+                ASKING_PHONE: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_phone)],
+                # Abandoned registrations are dropped after the timeout
+                ConversationHandler.TIMEOUT: [TypeHandler(Update, cancel_registration)]
             },
-            fallbacks=[CommandHandler("cancel", cancel_registration)]
+            fallbacks=[CommandHandler("cancel", cancel_registration)],
+            conversation_timeout=REGISTRATION_TIMEOUT,
+            per_user=True,
+            per_chat=False
         )
         
-        # Add admin command to list workers
-        app.add_handler(CommandHandler("workers", list_workers_command))
-
-        # Add admin command to show office info
-        app.add_handler(CommandHandler("office", office_info_command))
-
-        # Add admin command to create monthly sheets (current + next 2 months)
-        app.add_handler(CommandHandler("monthcreation", create_next_two_months_sheets))
-        app.add_handler(CommandHandler("attendance", attendance_command))
-
-        # Add message handler for location messages
-        app.add_handler(MessageHandler(filters.LOCATION, handle_location_message))
-        
-        # Add conversation handler for registration flow (MUST come before generic text handler)
-        app.add_handler(conv_handler)
-        
-        # Add message handler for persistent keyboard buttons (GENERIC - comes LAST)
-        app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_persistent_keyboard))
+        # Register all handlers in one batch - order matters, the first matching handler wins
+        app.add_handlers([
+            # Admin commands
+            CommandHandler("workers", list_workers_command),
+            CommandHandler("office", office_info_command),
+            # Create monthly sheets (current + next 2 months)
+            CommandHandler("monthcreation", create_next_two_months_sheets),
+            CommandHandler("attendance", attendance_command),
+            # Location messages
+            MessageHandler(filters.LOCATION, handle_location_message),
+            # Registration flow (MUST come before the keyboard text handler)
+            conv_handler,
+            # Persistent keyboard buttons (comes LAST) - only exact button labels reach it
+            MessageHandler(filters.Text(list(PERSISTENT_KEYBOARD_ROUTES)), handle_persistent_keyboard)
+        ])
         
-        # Initialize the application properly
+        # Initialize and start the application on this loop (starts the JobQueue and update processing)
         await app.initialize()
+        await app.start()
+        
+        # Warm the worker cache without delaying startup
+        spawn_background_task(prime_worker_cache(sheets_service))
         
         logger.info("🤖 Starting Working Metropolitan Bot...")
         
-        # Get port from environment (Render.com sets this)
-        port = int(os.getenv('PORT', 8080))
+        # Polling mode skips the webhook server entirely (local development)
+        if config['bot_mode'] == 'polling':
+            logger.info("🔄 BOT_MODE=polling - starting in polling mode")
+            await run_polling(app, shutdown_event)
+            return
         
-        # Create webhook URL dynamically
-        render_app_name = os.getenv('RENDER_APP_NAME', 'metropolitan-bot')
-        webhook_url = f"https://{render_app_name}.onrender.com/webhook"
+        port = config['webhook_port']
+        webhook_url = config['webhook_url']
         
         logger.info(f"🚀 Setting up webhook...")
         
@@ -1585,81 +1665,77 @@ async def main():
         retry_delay = 2  # Reduced from 5
         
         for attempt in range(max_retries):
+            logger.info(f"🔧 Webhook setup (attempt {attempt + 1}/{max_retries})")
+            
             try:
-                logger.info(f"🔧 Webhook setup (attempt {attempt + 1}/{max_retries})")
-                
-                # Use proper async calls
-                webhook_result = await app.bot.set_webhook(url=webhook_url)
+                webhook_result = await app.bot.set_webhook(
+                    url=webhook_url,
+                    max_connections=WEBHOOK_MAX_CONNECTIONS,
+                    allowed_updates=ALLOWED_UPDATES,
+                    secret_token=WEBHOOK_SECRET
+                )
                 
                 if webhook_result:
                     logger.info(f"✅ Webhook set successfully")
                     
                     # Quick verification
                     webhook_info = await app.bot.get_webhook_info()
-                    if webhook_info.url == webhook_url:
+                    webhook_success = webhook_info.url == webhook_url
+                    if webhook_success:
                         logger.info(f"✅ Webhook verified")
-                        webhook_success = True
                         break
-                    else:
-                        raise Exception("Webhook verification failed")
+                    logger.error(f"❌ Webhook attempt {attempt + 1} failed: verification returned {webhook_info.url!r}")
                 else:
-                    raise Exception("Webhook API returned False")
-                    
-            except Exception as e:
+                    logger.error(f"❌ Webhook attempt {attempt + 1} failed: Webhook API returned False")
+            except TelegramError as e:
+                # Network errors, timeouts and Bot API rejections - anything else is a bug and propagates
                 logger.error(f"❌ Webhook attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    logger.info(f"🔄 Retrying in {retry_delay} seconds...")
-                    await asyncio.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                else:
-                    logger.error("❌ All webhook attempts failed")
-                    break
+            
+            if attempt < max_retries - 1:
+                logger.info(f"🔄 Retrying in {retry_delay} seconds...")
+                await asyncio.sleep(retry_delay)
+                retry_delay *= 2  # Exponential backoff
+            else:
+                logger.error("❌ All webhook attempts failed")
         
         if not webhook_success:
             logger.error("❌ Failed to set webhook after all retries")
             logger.info("🔄 Falling back to polling mode for local development")
-            app.run_polling(timeout=30, drop_pending_updates=True)
+            await run_polling(app, shutdown_event)
             return
         
         # Create aiohttp web application
         web_app = web.Application()
-        web_app['bot'] = app.bot
-        web_app['application'] = app
         web_app['shutdown_event'] = shutdown_event
         
         # Add routes
-        web_app.router.add_post('/webhook', webhook_handler)
+        web_app.router.add_post('/webhook', make_webhook_handler(app))
         web_app.router.add_get('/health', health_check)
-        web_app.router.add_get('/', health_check)
+        web_app.router.add_get('/', liveness_probe)
         web_app.router.add_post('/shutdown', lambda r: shutdown_handler(r, shutdown_event))
         
         # Start the web server
         logger.info(f"🚀 Starting web server...")
         
         try:
-            # Use runner to avoid event loop conflicts
-            runner = web.AppRunner(web_app)
+            # Use runner to avoid event loop conflicts (no per-request access log lines)
+            runner = web.AppRunner(web_app, access_log=None, shutdown_timeout=WEBHOOK_SHUTDOWN_TIMEOUT)
             await runner.setup()
-            site = web.TCPSite(runner, '0.0.0.0', port)
+            site = web.TCPSite(runner, '0.0.0.0', port, backlog=WEBHOOK_BACKLOG, reuse_port=hasattr(socket, 'SO_REUSEPORT'))
             await site.start()
             
             logger.info(f"✅ Bot ready! Webhook: {webhook_url}")
             
-            # Keep the server running with proper shutdown handling
-            while not shutdown_event.is_set():
-                try:
-                    await asyncio.wait_for(shutdown_event.wait(), timeout=1.0)
-                except asyncio.TimeoutError:
-                    # Check for shutdown signal every second
-                    continue
-                
+            # Keep the server running on this loop until shutdown is requested
+            await shutdown_event.wait()
+            
             logger.info("🔄 Shutdown signal received, cleaning up...")
             
         except Exception as e:
             logger.error(f"❌ Failed to start web server: {e}")
             # Fallback to polling
             logger.info("🔄 Falling back to polling mode")
-            app.run_polling(timeout=30, drop_pending_updates=True)
+            await run_polling(app, shutdown_event)
                     
     except ValueError as e:
         logger.error(f"❌ Configuration error: {e}")
@@ -1668,7 +1744,26 @@ async def main():
     finally:
         # Cleanup on shutdown
         try:
+            # Users were already told their check-in/out succeeded - let those writes (and any failure reply) finish first
+            if _attendance_writes:
+                logger.info("⏳ Waiting for %d attendance write(s) before shutdown", len(_attendance_writes))
+                _, unfinished = await asyncio.wait(list(_attendance_writes.values()), timeout=ATTENDANCE_SHUTDOWN_TIMEOUT)
+                if unfinished:
+                    logger.error("❌ %d attendance write(s) still unsaved at shutdown", len(unfinished))
+            
+            # Stop accepting webhook requests before closing the services they use
+            if runner:
+                await runner.cleanup()
+            if app:
+                if app.updater and app.updater.running:
+                    await app.updater.stop()
+                if app.running:
+                    await app.stop()
+                await app.shutdown()
             await cleanup_expired_actions()
+            if sheets_service:
+                sheets_service.close()
+            await shared_cache.close()
             logger.info("🧹 Final cleanup completed")
         except Exception as e:
             logger.error(f"❌ Error during final cleanup: {e}")
@@ -1679,7 +1774,7 @@ async def attendance_command(update: Update, context):
         user = update.effective_user
         
         # Check if user is admin (you)
-        if user.username != "DenisZgl" and user.id != 123456789:  # Replace with your actual Telegram ID
+        if not is_admin(user):
             await update.message.reply_text("❌ Access denied. Admin only.")
             return
         
@@ -1690,27 +1785,24 @@ async def attendance_command(update: Update, context):
             return
         
         # Get current date in Greece timezone (GMT+3)
-        import pytz
-        greece_tz = pytz.timezone('Europe/Athens')
-        today = datetime.now(greece_tz)
-        current_date = today.strftime("%-m/%-d/%Y") if today.strftime("%-m/%-d/%Y") else today.strftime("%m/%d/%Y")
-        today_name = today.strftime("%A")  # Monday, Tuesday, etc.
+        today = datetime.now(GREECE_TZ)
+        current_date = format_sheet_date(today)
         
         # Get current week schedule to see who should work today
-        logger.info(f"🔍 DEBUG STEP 3: Getting active week sheet for date: {current_date}")
+        logger.debug("🔍 Getting active week sheet for date: %s", current_date)
         current_week_sheet = sheets_service.get_active_week_sheet(current_date)
-        logger.info(f"🔍 DEBUG STEP 3: Active week sheet returned: {current_week_sheet}")
+        logger.debug("🔍 Active week sheet returned: %s", current_week_sheet)
         
         # Read schedule sheet to get today's column and who should work
         try:
-            logger.info(f"🔍 DEBUG STEP 4: Reading schedule sheet: {current_week_sheet}")
-            schedule_result = sheets_service.service.spreadsheets().values().get(
+            logger.debug("🔍 Reading schedule sheet: %s", current_week_sheet)
+            schedule_result = await sheets_service.execute_async(sheets_service.service.spreadsheets().values().get(
                 spreadsheetId=sheets_service.spreadsheet_id,
                 range=f'{current_week_sheet}!A:Z'
-            ).execute()
+            ))
             
             schedule_values = schedule_result.get('values', [])
-            logger.info(f"🔍 DEBUG STEP 4: Schedule sheet rows returned: {len(schedule_values)}")
+            logger.debug("🔍 Schedule sheet rows returned: %s", len(schedule_values))
             if not schedule_values or len(schedule_values) < 4:
                 await update.message.reply_text("❌ Could not read schedule data.")
                 return
@@ -1721,16 +1813,16 @@ async def attendance_command(update: Update, context):
             # Row 3 contains the actual dates
             if len(schedule_values) > 2:  # Make sure Row 3 exists
                 row_3 = schedule_values[2]  # Row 3 (index 2)
-                logger.info(f"🔍 DEBUG STEP 5: Row 3 (dates) content: {row_3}")
+                logger.debug("🔍 Row 3 (dates) content: %s", row_3)
                 for col_idx, cell in enumerate(row_3[1:8]):  # Columns B-H
                     if str(cell).strip():
                         try:
                             # Parse the date from Row 3
                             cell_date = datetime.strptime(str(cell), "%m/%d/%Y")
-                            logger.info(f"🔍 DEBUG STEP 5: Parsed date from cell {col_idx+1}: {cell_date.date()}")
+                            logger.debug("🔍 Parsed date from cell %s: %s", col_idx+1, cell_date.date())
                             if cell_date.date() == today.date():
                                 today_col = col_idx + 1  # +1 because we skipped column A
-                                logger.info(f"🔍 DEBUG STEP 5: Found today's column: {col_idx + 1} for date {cell_date.date()}")
+                                logger.debug("🔍 Found today's column: %s for date %s", col_idx + 1, cell_date.date())
                                 break
                         except Exception as e:
                             logger.warning(f"⚠️ Could not parse date from cell: {cell} - {e}")
@@ -1741,61 +1833,47 @@ async def attendance_command(update: Update, context):
                 return
             
             # Get who should work today and their schedules
-            logger.info(f"🔍 DEBUG STEP 6: Looking for employees in column {today_col}")
+            logger.debug("🔍 Looking for employees in column %s", today_col)
             today_schedules = {}
             for row in schedule_values[4:]:  # Start from row 5 (index 4) to get Αγγελος
                 if len(row) > 0 and row[0] and today_col < len(row):
                     employee_name = row[0]
                     schedule = row[today_col] if row[today_col] else ""
-                    logger.info(f"🔍 DEBUG STEP 6: Employee {employee_name} has schedule: '{schedule}'")
+                    logger.debug("🔍 Employee %s has schedule: '%s'", employee_name, schedule)
                     if schedule and schedule.strip() and schedule.strip().upper() not in ['REST', 'OFF', '']:
                         today_schedules[employee_name] = schedule
-                        logger.info(f"🔍 DEBUG STEP 6: Added {employee_name} to today's schedules")
+                        logger.debug("🔍 Added %s to today's schedules", employee_name)
             
-            logger.info(f"🔍 DEBUG STEP 6: Total employees scheduled today: {len(today_schedules)}")
-            logger.info(f"🔍 DEBUG STEP 6: Today's schedules: {today_schedules}")
+            logger.debug("🔍 Total employees scheduled today: %s", len(today_schedules))
+            logger.debug("🔍 Today's schedules: %s", today_schedules)
             
             if not today_schedules:
                 await update.message.reply_text("📅 No one scheduled to work today.")
                 return
             
             # Now read monthly sheet to get today's attendance
-            logger.info(f"🔍 DEBUG STEP 7: Getting monthly sheet name")
+            logger.debug("🔍 Getting monthly sheet name")
             monthly_sheet = sheets_service.get_current_month_sheet_name()
-            logger.info(f"🔍 DEBUG STEP 7: Monthly sheet name: {monthly_sheet}")
+            logger.debug("🔍 Monthly sheet name: %s", monthly_sheet)
             
-            logger.info(f"🔍 DEBUG STEP 7: Getting today's column letter")
+            logger.debug("🔍 Getting today's column letter")
             today_column_letter = sheets_service.get_today_column_letter()
-            logger.info(f"🔍 DEBUG STEP 7: Today's column letter: {today_column_letter}")
+            logger.debug("🔍 Today's column letter: %s", today_column_letter)
             
             try:
-                logger.info(f"🔍 DEBUG STEP 7: Reading monthly sheet range: {monthly_sheet}!A:Z (full range to find all employees)")
-                attendance_result = sheets_service.service.spreadsheets().values().get(
+                logger.debug("🔍 Reading monthly sheet range: %s!A:Z (full range to find all employees)", monthly_sheet)
+                attendance_result = await sheets_service.execute_async(sheets_service.service.spreadsheets().values().get(
                     spreadsheetId=sheets_service.spreadsheet_id,
                     range=f'{monthly_sheet}!A:Z'
-                ).execute()
+                ))
                 
                 attendance_values = attendance_result.get('values', [])
-                logger.info(f"🔍 DEBUG STEP 8: Monthly sheet rows returned: {len(attendance_values)}")
+                logger.debug("🔍 Monthly sheet rows returned: %s", len(attendance_values))
                 if not attendance_values:
                     await update.message.reply_text("❌ Could not read attendance data.")
                     return
                 
                 # Find today's column in monthly sheet
-                logger.info(f"🔍 DEBUG STEP 8: Row 1 (dates) content: {attendance_values[0] if attendance_values else 'EMPTY'}")
-                
-                # Debug Row 2 content (employee data)
-                if len(attendance_values) > 1:
-                    logger.info(f"🔍 DEBUG STEP 8: Row 2 (first employee) content: {attendance_values[1]}")
-                    logger.info(f"🔍 DEBUG STEP 8: Row 2 length: {len(attendance_values[1])}")
-                else:
-                    logger.warning(f"🔍 DEBUG STEP 8: No Row 2 found - only {len(attendance_values)} rows")
-                
-                # Debug all rows in monthly sheet
-                logger.info(f"🔍 DEBUG STEP 8: All monthly sheet rows:")
-                for row_idx, row in enumerate(attendance_values):
-                    logger.info(f"🔍 DEBUG STEP 8: Row {row_idx}: {row}")
-                
                 today_monthly_col = None
                 for col_idx, cell in enumerate(attendance_values[0]):  # Row 1 has dates
                     if str(cell).strip():
@@ -1803,37 +1881,37 @@ async def attendance_command(update: Update, context):
                             # Parse date format (DD/MM)
                             if '/' in str(cell):
                                 day, month = str(cell).split('/')
-                                logger.info(f"🔍 DEBUG STEP 8: Parsed date from cell {col_idx}: day={day}, month={month}")
+                                logger.debug("🔍 Parsed date from cell %s: day=%s, month=%s", col_idx, day, month)
                                 if int(day) == today.day and int(month) == today.month:
                                     today_monthly_col = col_idx
-                                    logger.info(f"🔍 DEBUG STEP 8: Found today's column: {col_idx} for date {day}/{month}")
+                                    logger.debug("🔍 Found today's column: %s for date %s/%s", col_idx, day, month)
                                     break
                         except Exception as e:
-                            logger.warning(f"🔍 DEBUG STEP 8: Error parsing cell {col_idx}: {cell} - {e}")
+                            logger.warning("⚠️ Error parsing cell %s: %s - %s", col_idx, cell, e)
                             pass
                 
-                logger.info(f"🔍 DEBUG STEP 8: Today's monthly column: {today_monthly_col}")
+                logger.debug("🔍 Today's monthly column: %s", today_monthly_col)
                 if today_monthly_col is None:
                     await update.message.reply_text("❌ Could not find today's column in monthly sheet.")
                     return
                 
                 # Get attendance status for each scheduled employee
-                logger.info(f"🔍 DEBUG STEP 9: Starting attendance check for {len(today_schedules)} employees")
+                logger.debug("🔍 Starting attendance check for %s employees", len(today_schedules))
                 attendance_report = {
                     'checked_in': [],
                     'not_checked_in': []
                 }
                 
                 for employee_name in today_schedules.keys():
-                    logger.info(f"🔍 DEBUG STEP 9: Checking attendance for {employee_name}")
+                    logger.debug("🔍 Checking attendance for %s", employee_name)
                     # Find employee row in monthly sheet
                     employee_found = False
                     for row_idx, row in enumerate(attendance_values[1:]):  # Skip header row (0), start from row 1
                         if len(row) > 0 and row[0] == employee_name:
                             employee_found = True
-                            logger.info(f"🔍 DEBUG STEP 9: Found {employee_name} at row {row_idx+1}")
-                            logger.info(f"🔍 DEBUG STEP 9: Row content: {row}")
-                            logger.info(f"🔍 DEBUG STEP 9: Looking in column {today_monthly_col}, row length: {len(row)}")
+                            logger.debug("🔍 Found %s at row %s", employee_name, row_idx+1)
+                            logger.debug("🔍 Row content: %s", row)
+                            logger.debug("🔍 Looking in column %s, row length: %s", today_monthly_col, len(row))
                             
                             if today_monthly_col < len(row) and row[today_monthly_col]:
                                 full_check_in_data = row[today_monthly_col]
@@ -1842,20 +1920,20 @@ async def attendance_command(update: Update, context):
                                 # Extract check-in time from full schedule format (e.g., "09:00-17:00" -> "09:00")
                                 if '-' in str(full_check_in_data):
                                     check_in_time = str(full_check_in_data).split('-')[0]
-                                    logger.info(f"🔍 DEBUG STEP 9: {employee_name} CHECKED IN at {check_in_time} (extracted from {full_check_in_data})")
+                                    logger.debug("🔍 %s CHECKED IN at %s (extracted from %s)", employee_name, check_in_time, full_check_in_data)
                                 else:
                                     check_in_time = str(full_check_in_data)
-                                    logger.info(f"🔍 DEBUG STEP 9: {employee_name} CHECKED IN at {check_in_time}")
+                                    logger.debug("🔍 %s CHECKED IN at %s", employee_name, check_in_time)
                                 
                                 # Determine if late or on time
                                 try:
-                                    logger.info(f"🔍 DEBUG STEP 9: Processing check-in for {employee_name}: time={check_in_time}, schedule={schedule_time}")
+                                    logger.debug("🔍 Processing check-in for %s: time=%s, schedule=%s", employee_name, check_in_time, schedule_time)
                                     
                                     # Parse check-in time (format: HH:MM)
                                     if ':' in str(check_in_time):
                                         check_hour, check_minute = map(int, str(check_in_time).split(':'))
                                         check_in_minutes = check_hour * 60 + check_minute
-                                        logger.info(f"🔍 DEBUG STEP 9: Check-in time parsed: {check_hour}:{check_minute} = {check_in_minutes} minutes")
+                                        logger.debug("🔍 Check-in time parsed: %s:%s = %s minutes", check_hour, check_minute, check_in_minutes)
                                         
                                         # Parse schedule start time (format: HH:MM-HH:MM)
                                         if '-' in schedule_time:
@@ -1863,16 +1941,16 @@ async def attendance_command(update: Update, context):
                                             if ':' in schedule_start:
                                                 sched_hour, sched_minute = map(int, schedule_start.split(':'))
                                                 schedule_minutes = sched_hour * 60 + sched_minute
-                                                logger.info(f"🔍 DEBUG STEP 9: Schedule start parsed: {sched_hour}:{sched_minute} = {schedule_minutes} minutes")
+                                                logger.debug("🔍 Schedule start parsed: %s:%s = %s minutes", sched_hour, sched_minute, schedule_minutes)
                                                 
                                                 # Determine status
                                                 grace_period = 5
                                                 if check_in_minutes <= schedule_minutes + grace_period:
                                                     status = "On time"
-                                                    logger.info(f"🔍 DEBUG STEP 9: {employee_name} is ON TIME (check-in: {check_in_minutes}, schedule: {schedule_minutes}, grace: {grace_period})")
+                                                    logger.debug("🔍 %s is ON TIME (check-in: %s, schedule: %s, grace: %s)", employee_name, check_in_minutes, schedule_minutes, grace_period)
                                                 else:
                                                     status = "Late"
-                                                    logger.info(f"🔍 DEBUG STEP 9: {employee_name} is LATE (check-in: {check_in_minutes}, schedule: {schedule_minutes}, grace: {grace_period})")
+                                                    logger.debug("🔍 %s is LATE (check-in: %s, schedule: %s, grace: %s)", employee_name, check_in_minutes, schedule_minutes, grace_period)
                                                 
                                                 attendance_report['checked_in'].append({
                                                     'name': employee_name,
@@ -1880,9 +1958,9 @@ async def attendance_command(update: Update, context):
                                                     'status': status,
                                                     'schedule': schedule_time
                                                 })
-                                                logger.info(f"🔍 DEBUG STEP 9: Added {employee_name} to checked_in with status: {status}")
+                                                logger.debug("🔍 Added %s to checked_in with status: %s", employee_name, status)
                                             else:
-                                                logger.warning(f"🔍 DEBUG STEP 9: Could not parse schedule start time: {schedule_start}")
+                                                logger.warning("⚠️ Could not parse schedule start time: %s", schedule_start)
                                                 attendance_report['checked_in'].append({
                                                     'name': employee_name,
                                                     'time': check_in_time,
@@ -1890,7 +1968,7 @@ async def attendance_command(update: Update, context):
                                                     'schedule': schedule_time
                                                 })
                                         else:
-                                            logger.warning(f"🔍 DEBUG STEP 9: Schedule time format invalid: {schedule_time}")
+                                            logger.warning("⚠️ Schedule time format invalid: %s", schedule_time)
                                             attendance_report['checked_in'].append({
                                                 'name': employee_name,
                                                 'time': check_in_time,
@@ -1898,7 +1976,7 @@ async def attendance_command(update: Update, context):
                                                 'schedule': schedule_time
                                             })
                                     else:
-                                        logger.warning(f"🔍 DEBUG STEP 9: Check-in time format invalid: {check_in_time}")
+                                        logger.warning("⚠️ Check-in time format invalid: %s", check_in_time)
                                         attendance_report['checked_in'].append({
                                             'name': employee_name,
                                             'time': check_in_time,
@@ -1906,7 +1984,7 @@ async def attendance_command(update: Update, context):
                                             'schedule': schedule_time
                                         })
                                 except Exception as e:
-                                    logger.warning(f"🔍 DEBUG STEP 9: Error processing check-in for {employee_name}: {e}")
+                                    logger.warning("⚠️ Error processing check-in for %s: %s", employee_name, e)
                                     attendance_report['checked_in'].append({
                                         'name': employee_name,
                                         'time': check_in_time,
@@ -1915,7 +1993,7 @@ async def attendance_command(update: Update, context):
                                     })
                             else:
                                 # Not checked in
-                                logger.info(f"🔍 DEBUG STEP 9: {employee_name} NOT CHECKED IN (column {today_monthly_col} empty or out of range)")
+                                logger.debug("🔍 %s NOT CHECKED IN (column %s empty or out of range)", employee_name, today_monthly_col)
                                 attendance_report['not_checked_in'].append({
                                     'name': employee_name,
                                     'schedule': today_schedules[employee_name]
@@ -1923,16 +2001,16 @@ async def attendance_command(update: Update, context):
                             break
                     
                     if not employee_found:
-                        logger.info(f"🔍 DEBUG STEP 9: {employee_name} NOT FOUND in monthly sheet")
+                        logger.debug("🔍 %s NOT FOUND in monthly sheet", employee_name)
                         attendance_report['not_checked_in'].append({
                             'name': employee_name,
                             'schedule': today_schedules[employee_name]
                         })
                 
-                logger.info(f"🔍 DEBUG STEP 9: Final attendance report: {attendance_report}")
+                logger.debug("🔍 Final attendance report: %s", attendance_report)
                 
                 # Generate the new redesigned report
-                report = f"📊 **TODAY'S ATTENDANCE** ({today.strftime('%d/%m/%Y')})\n\n"
+                report = f"📊 <b>TODAY'S ATTENDANCE</b> ({today.strftime('%d/%m/%Y')})\n\n"
                 
                 # Separate employees by status
                 on_time_employees = []
@@ -1954,23 +2032,23 @@ async def attendance_command(update: Update, context):
                 
                 # 1. GREEN: Checked in (On time)
                 if on_time_employees:
-                    report += "🟢 **CHECKED IN (ON TIME):**\n"
+                    report += "🟢 <b>CHECKED IN (ON TIME):</b>\n"
                     for employee in on_time_employees:
-                        report += f"• {employee['name']} - {employee['time']}\n"
+                        report += f"• {html.escape(employee['name'])} - {html.escape(employee['time'])}\n"
                     report += "\n"
                 
                 # 2. YELLOW: Checked in (Late)
                 if late_employees:
-                    report += "🟡 **CHECKED IN (LATE):**\n"
+                    report += "🟡 <b>CHECKED IN (LATE):</b>\n"
                     for employee in late_employees:
-                        report += f"• {employee['name']} - {employee['time']}\n"
+                        report += f"• {html.escape(employee['name'])} - {html.escape(employee['time'])}\n"
                     report += "\n"
                 
                 # 3. RED: Didn't check in
                 if not_checked_in_employees:
-                    report += "🔴 **DIDN'T CHECK IN:**\n"
+                    report += "🔴 <b>DIDN'T CHECK IN:</b>\n"
                     for employee in not_checked_in_employees:
-                        report += f"• {employee['name']}\n"
+                        report += f"• {html.escape(employee['name'])}\n"
                     report += "\n"
                 
                 # Add summary
@@ -1978,12 +2056,12 @@ async def attendance_command(update: Update, context):
                 total_checked_in = len(attendance_report['checked_in'])
                 total_missing = len(attendance_report['not_checked_in'])
                 
-                report += f"📈 **SUMMARY:**\n"
+                report += f"📈 <b>SUMMARY:</b>\n"
                 report += f"• Total Scheduled: {total_scheduled}\n"
                 report += f"• Checked In: {total_checked_in}\n"
                 report += f"• Missing: {total_missing}"
                 
-                await update.message.reply_text(report, parse_mode='Markdown')
+                await update.message.reply_text(report, parse_mode='HTML')
                 
             except Exception as e:
                 logger.error(f"Error reading monthly attendance: {e}")
@@ -1998,28 +2076,17 @@ async def attendance_command(update: Update, context):
         await update.message.reply_text("❌ Σφάλμα κατά την ανάκτηση της αναφοράς.")
 
 if __name__ == "__main__":
-    # Create logs directory
-    os.makedirs("logs", exist_ok=True)
-    
-    # Set up signal handling for graceful shutdown
-    def signal_handler(signum, frame):
-        logger.info(f"🔄 Received signal {signum}, initiating graceful shutdown...")
-        # The shutdown will be handled by the shutdown_event in main()
-    
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    # Run the bot on uvloop when installed - aiohttp and PTB share the same loop
+    if uvloop:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.info("✅ Using uvloop event loop")
     
     # Run the bot with proper async handling and error recovery
     try:
-        import asyncio
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("🔄 Keyboard interrupt received, shutting down gracefully...")
     except Exception as e:
+        # main() already cleaned up in its finally block
         logger.error(f"❌ Fatal error in main: {e}")
-        # Attempt to clean up
-        try:
-            cleanup_expired_actions()
-        except:
-            pass
         raise
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+🧵 BACKGROUND TASKS
+Fire-and-forget tasks shared by the bot and its services
+"""
+
+import asyncio
+
+# Strong references to fire-and-forget tasks - the event loop only keeps weak ones
+_background_tasks = set()
+
+def spawn_background_task(coro) -> asyncio.Task:
+    """Start a coroutine in the background, keeping it alive until it finishes"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+🗄️ CACHE SERVICE
+Shared TTL cache for worker lookups and attendance status
+Uses Redis when REDIS_URL is set (multiple bot instances), otherwise in-process memory
+"""
+
+import heapq
+import json
+import logging
+import time
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class CacheService:
+    """TTL cache backed by Redis or in-process memory"""
+
+    def __init__(self, redis_url: Optional[str] = None, prefix: str = 'metropolitan:'):
+        self.prefix = prefix
+        self._redis = None
+        # key -> (expires_at, value) when running without Redis
+        self._memory = {}
+        # (expires_at, key) min-heap - soonest expiry first, so a sweep stops at the first live entry.
+        # Overwritten keys leave stale heap entries behind; the sweep skips them
+        self._expiry_heap = []
+
+        if redis_url:
+            try:
+                import redis.asyncio as redis_asyncio
+                # Connections are opened lazily on first command
+                self._redis = redis_asyncio.from_url(redis_url, decode_responses=True)
+                logger.info("✅ Redis cache enabled")
+            except ImportError:
+                logger.warning("⚠️ REDIS_URL is set but the redis package is not installed - using in-memory cache")
+
+        if not self._redis:
+            logger.info("✅ In-memory cache enabled")
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None if missing or expired"""
+        if self._redis:
+            try:
+                raw = await self._redis.get(self.prefix + key)
+                return json.loads(raw) if raw else None
+            except Exception as e:
+                logger.warning(f"⚠️ Redis get failed for {key}: {e}")
+                return None
+
+        entry = self._memory.get(key)
+        if not entry:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._memory[key]
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: Any, ttl_seconds: int):
+        """Cache a JSON-serializable value for ttl_seconds"""
+        if self._redis:
+            try:
+                await self._redis.set(self.prefix + key, json.dumps(value), ex=ttl_seconds)
+            except Exception as e:
+                logger.warning(f"⚠️ Redis set failed for {key}: {e}")
+            return
+
+        expires_at = time.monotonic() + ttl_seconds
+        self._memory[key] = (expires_at, value)
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+
+    async def delete(self, key: str):
+        """Remove a cached value"""
+        if self._redis:
+            try:
+                await self._redis.delete(self.prefix + key)
+            except Exception as e:
+                logger.warning(f"⚠️ Redis delete failed for {key}: {e}")
+            return
+
+        self._memory.pop(key, None)
+
+    def sweep(self) -> int:
+        """Drop expired in-memory entries from the front of the expiry heap (Redis expires keys itself), return how many were removed"""
+        now = time.monotonic()
+        removed = 0
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            entry = self._memory.get(key)
+            # Skip heap entries for keys that were deleted or set again since
+            if entry and entry[0] == expires_at:
+                del self._memory[key]
+                removed += 1
+        return removed
+
+    async def close(self):
+        """Close the Redis connection pool"""
+        if self._redis:
+            try:
+                await self._redis.aclose()
+            except Exception as e:
+                logger.warning(f"⚠️ Error closing Redis connection: {e}")
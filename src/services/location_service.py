@@ -29,12 +29,27 @@ class LocationService:
             if key.startswith('OFFICE_'):
                 logger.info(f"🔍 DEBUG:   {key} = '{value}'")
         logger.info(f"📍 Office zone set: {self.office_latitude}, {self.office_longitude} (radius: {self.office_radius_meters}m)")
+        
+        # Office coordinates never change - precompute the trig terms used on every location check
+        self.office_lat_rad = math.radians(self.office_latitude)
+        self.office_lon_rad = math.radians(self.office_longitude)
+        self.office_cos_lat = math.cos(self.office_lat_rad)
+        
+        # Bounding box around the zone (radians, 1% margin) - points outside it skip the haversine
+        self.zone_lat_delta = self.office_radius_meters / 6371000 * 1.01
+        self.zone_lon_delta = self.zone_lat_delta / self.office_cos_lat
+        
+        self.office_info = {
+            'latitude': self.office_latitude,
+            'longitude': self.office_longitude,
+            'radius_meters': self.office_radius_meters,
+            'description': 'Metropolitan Office Zone'
+        }
     
     def calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate distance between two points using Haversine formula (in meters)"""
-        logger.info(f"🔍 DEBUG: calculate_distance called with:")
-        logger.info(f"🔍 DEBUG:   Point 1 (Office): lat={lat1}, lon={lon1}")
-        logger.info(f"🔍 DEBUG:   Point 2 (User): lat={lat2}, lon={lon2}")
+        # Raw coordinates only at DEBUG level - user locations are personal data
+        logger.debug("🔍 calculate_distance: point 1 lat=%s, lon=%s; point 2 lat=%s, lon=%s", lat1, lon1, lat2, lon2)
         
         # Convert to radians
         lat1_rad = math.radians(lat1)
@@ -42,50 +57,55 @@ class LocationService:
         lat2_rad = math.radians(lat2)
         lon2_rad = math.radians(lon2)
         
-        logger.info(f"🔍 DEBUG: Converted to radians:")
-        logger.info(f"🔍 DEBUG:   lat1_rad={lat1_rad}, lon1_rad={lon1_rad}")
-        logger.info(f"🔍 DEBUG:   lat2_rad={lat2_rad}, lon2_rad={lon2_rad}")
-        
         # Haversine formula
         dlat = lat2_rad - lat1_rad
         dlon = lon2_rad - lon1_rad
         
-        logger.info(f"🔍 DEBUG: Differences: dlat={dlat}, dlon={dlon}")
-        
         a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
         c = 2 * math.asin(math.sqrt(a))
         
-        logger.info(f"🔍 DEBUG: Haversine calculation: a={a}, c={c}")
-        
         # Earth's radius in meters
         earth_radius = 6371000
         
         distance = earth_radius * c
-        logger.info(f"🔍 DEBUG: Final distance calculation: {earth_radius} * {c} = {distance} meters")
+        logger.debug("🔍 calculate_distance: %s meters", distance)
         
         return distance
     
+    def distance_from_office(self, latitude: float, longitude: float) -> float:
+        """Haversine distance from the office (in meters) using the precomputed office terms"""
+        lat_rad = math.radians(latitude)
+        dlat = lat_rad - self.office_lat_rad
+        dlon = math.radians(longitude) - self.office_lon_rad
+        
+        a = math.sin(dlat/2)**2 + self.office_cos_lat * math.cos(lat_rad) * math.sin(dlon/2)**2
+        c = 2 * math.asin(math.sqrt(a))
+        
+        # Earth's radius in meters
+        return 6371000 * c
+    
+    def approximate_distance_from_office(self, latitude: float, longitude: float) -> float:
+        """Equirectangular distance from the office (in meters) - no trig, used for out-of-zone points"""
+        dy = math.radians(latitude) - self.office_lat_rad
+        dx = (math.radians(longitude) - self.office_lon_rad) * self.office_cos_lat
+        return 6371000 * math.sqrt(dx*dx + dy*dy)
+    
     def is_within_office_zone(self, latitude: float, longitude: float) -> Dict[str, any]:
         """Check if location is within office zone"""
-        logger.info(f"🔍 DEBUG: is_within_office_zone called with user coordinates: lat={latitude}, lon={longitude}")
-        logger.info(f"🔍 DEBUG: Office coordinates: lat={self.office_latitude}, lon={self.office_longitude}")
-        logger.info(f"🔍 DEBUG: Office radius: {self.office_radius_meters} meters")
+        # Raw coordinates only at DEBUG level - user locations are personal data
+        logger.debug("🔍 is_within_office_zone called with user coordinates: lat=%s, lon=%s", latitude, longitude)
         
         try:
-            # Calculate distance to office
-            logger.info(f"🔍 DEBUG: Calling calculate_distance...")
-            distance = self.calculate_distance(
-                self.office_latitude, 
-                self.office_longitude, 
-                latitude, 
-                longitude
-            )
-            
-            logger.info(f"🔍 DEBUG: Distance calculated: {distance} meters")
+            # Cheap bounding-box reject first, full haversine only for near hits
+            if (abs(math.radians(latitude) - self.office_lat_rad) > self.zone_lat_delta or
+                    abs(math.radians(longitude) - self.office_lon_rad) > self.zone_lon_delta):
+                distance = self.approximate_distance_from_office(latitude, longitude)
+            else:
+                distance = self.distance_from_office(latitude, longitude)
             
             # Check if within radius
             is_within = distance <= self.office_radius_meters
-            logger.info(f"🔍 DEBUG: Within radius check: {distance} <= {self.office_radius_meters} = {is_within}")
+            logger.debug("🔍 Within radius check: %s <= %s = %s", distance, self.office_radius_meters, is_within)
             
             result = {
                 'is_within': is_within,
@@ -97,8 +117,6 @@ class LocationService:
                 'radius_meters': self.office_radius_meters
             }
             
-            logger.info(f"🔍 DEBUG: Final result: {result}")
-            
             if is_within:
                 logger.info(f"✅ Location verified: {distance:.2f}m from office")
             else:
@@ -119,15 +137,10 @@ class LocationService:
     
     def get_office_info(self) -> Dict[str, any]:
         """Get office zone information"""
-        return {
-            'latitude': self.office_latitude,
-            'longitude': self.office_longitude,
-            'radius_meters': self.office_radius_meters,
-            'description': 'Metropolitan Office Zone'
-        }
+        return self.office_info
     
     def format_location_message(self, location_result: Dict[str, any]) -> str:
-        """Format location result into user-friendly message"""
+        """Format location result into user-friendly message (HTML)"""
         if location_result.get('error'):
             return "❌ Σφάλμα κατά την επαλήθευση της τοποθεσίας."
         
@@ -135,6 +148,6 @@ class LocationService:
         is_within = location_result['is_within']
         
         if is_within:
-            return f"✅ **Τοποθεσία επαληθεύθηκε!**\n\n📍 Είστε {distance}m από το γραφείο\n✅ Μπορείτε να κάνετε check-in/out"
+            return f"✅ <b>Τοποθεσία επαληθεύθηκε!</b>\n\n📍 Είστε {distance}m από το γραφείο\n✅ Μπορείτε να κάνετε check-in/out"
         else:
             return f"❌ Εκτός εργασιακής ζώνης\n\n📍 Απόσταση: {distance}m\n❌ Απαιτείται: {self.office_radius_meters}m"
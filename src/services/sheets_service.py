@@ -6,21 +6,140 @@ Handles Google Sheets operations for worker data and monthly attendance
 
 import logging
 import asyncio
-from typing import Optional, Dict, List
+import threading
+import time
+from enum import IntEnum
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Tuple
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+import google_auth_httplib2
+import httplib2
 import os
-from datetime import datetime
+import pytz
+from datetime import datetime, timedelta
+from src.services.background_tasks import spawn_background_task
 
 logger = logging.getLogger(__name__)
 
+# Worker threads (and so keep-alive Sheets connections) shared for the bot's lifetime
+SHEETS_MAX_WORKERS = 8
+# Socket timeout (seconds) for Sheets HTTP connections
+SHEETS_HTTP_TIMEOUT = 30
+# Attempts for requests that hit the Sheets rate limit (HTTP 429)
+SHEETS_MAX_ATTEMPTS = 5
+# Seconds the spreadsheet's sheet titles/IDs are reused before re-reading its metadata
+SHEET_METADATA_TTL = 300
+# Attendance days and sheet names follow Greek local time
+GREECE_TZ = pytz.timezone('Europe/Athens')
+
+class AttendanceStatus(IntEnum):
+    """Today's attendance state for a worker - negative values are lookup failures"""
+    ERROR = -3
+    NOT_REGISTERED = -2
+    UNKNOWN = -1
+    NOT_CHECKED_IN = 0
+    CHECKED_IN = 1
+    COMPLETE = 2
+
+class SheetsWriteCoalescer:
+    """Coalesces single-cell writes issued close together into one values.batchUpdate"""
+    
+    def __init__(self, sheets_service, max_batch: int = 50):
+        self.sheets_service = sheets_service
+        self.max_batch = max_batch
+        self._queue = None
+        self._worker = None
+        # Batch being written right now - close() fails these too, since cancelling the worker abandons them
+        self._current_batch = []
+    
+    async def submit(self, cell_range: str, value: str):
+        """Queue a cell write and wait until the batch containing it has been written"""
+        # Worker is started lazily so it runs on the bot's event loop
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = spawn_background_task(self._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((cell_range, value, future))
+        return await future
+    
+    async def _run(self):
+        """Drain queued writes in batches - writes that arrive during a flush go out together in the next one"""
+        while True:
+            batch = [await self._queue.get()]
+            
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            
+            self._current_batch = batch
+            try:
+                await self._flush(batch)
+            finally:
+                self._current_batch = []
+    
+    async def _flush(self, batch):
+        """Write one batch and resolve the waiting futures"""
+        try:
+            result = await self.sheets_service.execute_async(self.sheets_service.service.spreadsheets().values().batchUpdate(
+                spreadsheetId=self.sheets_service.spreadsheet_id,
+                body={
+                    'valueInputOption': 'RAW',
+                    'data': [{'range': cell_range, 'values': [[value]]} for cell_range, value, _ in batch]
+                }
+            ))
+            logger.info(f"✅ Wrote {len(batch)} attendance cell(s) in one batch")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            if len(batch) == 1:
+                _, _, future = batch[0]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            
+            # One bad range (e.g. a monthly sheet that doesn't exist yet) fails the whole batchUpdate -
+            # retry the writes one by one so only the bad one fails
+            logger.warning(f"⚠️ Batch of {len(batch)} attendance writes failed, retrying individually: {e}")
+            await asyncio.gather(*[self._flush([item]) for item in batch])
+    
+    def close(self):
+        """Stop the batching worker and fail writes in flight or still waiting in the queue"""
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+        pending = list(self._current_batch)
+        self._current_batch = []
+        while self._queue and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Sheets write coalescer closed"))
+
 class GoogleSheetsService:
     """Service for Google Sheets operations"""
     
     def __init__(self, spreadsheet_id: str):
         self.spreadsheet_id = spreadsheet_id
         self.service = None
+        self.credentials = None
+        # httplib2 is not thread-safe - each worker thread gets its own authorized connection,
+        # reused for every request that thread runs
+        self._executor = ThreadPoolExecutor(max_workers=SHEETS_MAX_WORKERS, thread_name_prefix='sheets')
+        # Callers wait here rather than in the executor queue - a cancelled caller never reaches a thread
+        self._slots = asyncio.Semaphore(SHEETS_MAX_WORKERS)
+        self._thread_local = threading.local()
+        self._http_connections = []
+        # Attendance cell writes are batched into values.batchUpdate calls
+        self.write_coalescer = SheetsWriteCoalescer(self)
+        # (year, month) -> sheet name for the month it was last resolved in
+        self._month_sheet = (None, '')
+        # (fetched_at, sheet title -> sheetId) from the last spreadsheet metadata read
+        self._sheet_ids = (float('-inf'), {})
         self.setup_credentials()
     
     def setup_credentials(self):
@@ -41,7 +160,7 @@ class GoogleSheetsService:
                     # Use decoded credentials
                     scopes = ['https://www.googleapis.com/auth/spreadsheets']
                     credentials = Credentials.from_service_account_info(creds_data, scopes=scopes)
-                    self.service = build('sheets', 'v4', credentials=credentials)
+                    self._build_service(credentials)
                     logger.info("✅ Google Sheets API ready")
                     return
                 except Exception as e:
@@ -54,7 +173,7 @@ class GoogleSheetsService:
                 # Use service account credentials file
                 scopes = ['https://www.googleapis.com/auth/spreadsheets']
                 credentials = Credentials.from_service_account_file(creds_file, scopes=scopes)
-                self.service = build('sheets', 'v4', credentials=credentials)
+                self._build_service(credentials)
                 logger.info("✅ Google Sheets API ready")
             else:
                 # No credentials found
@@ -65,11 +184,93 @@ class GoogleSheetsService:
             logger.error(f"❌ Error setting up Google Sheets: {e}")
             self.service = None
     
+    def _build_service(self, credentials):
+        """Build the single shared Sheets client for these credentials"""
+        self.credentials = credentials
+        # Use the discovery document bundled with google-api-python-client: no network
+        # fetch at startup and no file cache lookup (which only logs a warning on google-auth)
+        self.service = build('sheets', 'v4', credentials=credentials, cache_discovery=False, static_discovery=True)
+    
+    def _thread_http(self):
+        """Get the authorized HTTP connection for the current thread"""
+        http = getattr(self._thread_local, 'http', None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=SHEETS_HTTP_TIMEOUT))
+            self._thread_local.http = http
+            self._http_connections.append(http)
+        return http
+    
+    async def execute_async(self, request):
+        """Execute a Google API request in a worker thread so the event loop is not blocked"""
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            return await loop.run_in_executor(self._executor, lambda: request.execute(http=self._thread_http()))
+    
+    async def execute_with_backoff(self, request, max_attempts: int = SHEETS_MAX_ATTEMPTS):
+        """Execute a request, retrying rate limited (429) responses after Retry-After or exponential backoff"""
+        delay = 1
+        for attempt in range(1, max_attempts + 1):
+            try:
+                return await self.execute_async(request)
+            except HttpError as e:
+                if e.resp.status != 429 or attempt == max_attempts:
+                    raise
+                retry_after = e.resp.get('retry-after', '')
+                wait = int(retry_after) if retry_after.isdigit() else delay
+                logger.warning(f"⏳ Sheets rate limit hit - retrying in {wait}s (attempt {attempt}/{max_attempts})")
+                await asyncio.sleep(wait)
+                delay *= 2
+    
+    async def get_sheet_ids(self, max_age: float = SHEET_METADATA_TTL) -> Dict[str, int]:
+        """Map sheet titles to sheet IDs, re-reading the spreadsheet metadata at most every max_age seconds"""
+        fetched_at, sheet_ids = self._sheet_ids
+        if time.monotonic() - fetched_at < max_age:
+            return sheet_ids
+        
+        # Only titles and IDs - not the full grid metadata
+        result = await self.execute_with_backoff(self.service.spreadsheets().get(
+            spreadsheetId=self.spreadsheet_id,
+            fields='sheets.properties(title,sheetId)'
+        ))
+        sheet_ids = {sheet['properties']['title']: sheet['properties']['sheetId'] for sheet in result.get('sheets', [])}
+        self._sheet_ids = (time.monotonic(), sheet_ids)
+        return sheet_ids
+    
+    def remember_added_sheets(self, batch_update_reply: Dict) -> Dict[str, int]:
+        """Record sheets created by an addSheet batchUpdate in the metadata cache, return their title -> sheetId"""
+        added_ids = {
+            added['addSheet']['properties']['title']: added['addSheet']['properties']['sheetId']
+            for added in batch_update_reply.get('replies', []) if 'addSheet' in added
+        }
+        self._sheet_ids[1].update(added_ids)
+        return added_ids
+    
+    async def run_in_thread(self, func, *args):
+        """Run a blocking service method on the Sheets worker threads"""
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            return await loop.run_in_executor(self._executor, func, *args)
+    
+    def close(self):
+        """Stop the worker threads and close their Sheets connections"""
+        self.write_coalescer.close()
+        self._executor.shutdown(wait=False)
+        for http in self._http_connections:
+            try:
+                http.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Error closing Sheets connection: {e}")
+        self._http_connections.clear()
+        logger.info("🔌 Google Sheets connections closed")
+    
     def get_current_month_sheet_name(self) -> str:
         """Get current month sheet name in format MM_YYYY based on real Greek timezone with smart fallback"""
-        import pytz
-        greece_tz = pytz.timezone('Europe/Athens')
-        now = datetime.now(greece_tz)
+        now = datetime.now(GREECE_TZ)
+        
+        # The name only changes at month rollover
+        month_key = (now.year, now.month)
+        if self._month_sheet[0] == month_key:
+            return self._month_sheet[1]
         
         # Smart year detection with fallback
         current_year = now.year
@@ -83,16 +284,15 @@ class GoogleSheetsService:
             year = current_year
             
         sheet_name = f"{now.month:02d}_{year}"
-        logger.info(f"🔍 DEBUG SHEET: Current sheet name: {sheet_name}")
-        logger.info(f"🔍 DEBUG SHEET: System year: {current_year}, Using year: {year}")
-        logger.info(f"🔍 DEBUG SHEET: Spreadsheet ID: {self.spreadsheet_id}")
+        logger.debug("🔍 Current sheet name: %s", sheet_name)
+        logger.debug("🔍 System year: %s, using year: %s", current_year, year)
+        logger.debug("🔍 Spreadsheet ID: %s", self.spreadsheet_id)
+        self._month_sheet = (month_key, sheet_name)
         return sheet_name
     
     def get_today_column_letter(self) -> str:
         """Get today's column letter (B=1st, C=2nd, etc.)"""
-        import pytz
-        greece_tz = pytz.timezone('Europe/Athens')
-        day = datetime.now(greece_tz).day
+        day = datetime.now(GREECE_TZ).day
         # Column A is names, so day 1 = column B, day 2 = column C, etc.
         # Handle days beyond 26 (Z) by using AA, AB, AC, etc.
         if day <= 26:
@@ -103,7 +303,7 @@ class GoogleSheetsService:
             second_letter = chr(ord('A') + (day - 26))
             column_letter = first_letter + second_letter
         
-        logger.info(f"🔍 DEBUG COLUMN: Today is day {day}, using column {column_letter}")
+        logger.debug("🔍 Today is day %s, using column %s", day, column_letter)
         return column_letter
     
     async def ensure_monthly_sheet_exists(self) -> bool:
@@ -116,14 +316,7 @@ class GoogleSheetsService:
             
             # Check if sheet exists
             try:
-                result = self.service.spreadsheets().get(
-                    spreadsheetId=self.spreadsheet_id
-                ).execute()
-                
-                sheet_exists = any(sheet['properties']['title'] == sheet_name 
-                                 for sheet in result.get('sheets', []))
-                
-                if sheet_exists:
+                if sheet_name in await self.get_sheet_ids():
                     logger.info(f"✅ Monthly sheet {sheet_name} already exists")
                     return True
                     
@@ -134,73 +327,50 @@ class GoogleSheetsService:
             # Create new sheet if it doesn't exist
             logger.info(f"🔄 Creating new monthly sheet: {sheet_name}")
             
-            # Get the first sheet to use as template
-            first_sheet = result['sheets'][0]
-            sheet_id = first_sheet['properties']['sheetId']
-            
-            # Create new sheet
-            request = {
-                'addSheet': {
-                    'properties': {
-                        'title': sheet_name,
-                        'gridProperties': {
-                            'rowCount': 1000,
-                            'columnCount': 32  # 31 days + name column
-                        }
-                    }
-                }
-            }
-            
-            self.service.spreadsheets().batchUpdate(
-                spreadsheetId=self.spreadsheet_id,
-                body={'requests': [request]}
-            ).execute()
-            
-            # Set up headers COMPLETELY before returning
-            await self.setup_monthly_sheet_headers(sheet_name)
-            
-            # Wait a moment to ensure headers are fully set
-            import asyncio
-            await asyncio.sleep(1)
+            # Sheet and headers are COMPLETELY set up before styling
+            if not await self.create_monthly_sheet(sheet_name):
+                return False
             
             # Style the sheet with colors and formatting
             await self.style_monthly_sheet(sheet_name)
-            
-            logger.info(f"✅ Created new monthly sheet: {sheet_name}")
             return True
             
         except Exception as e:
             logger.error(f"❌ Error creating monthly sheet: {e}")
             return False
     
-    async def create_monthly_sheet(self, sheet_name: str):
-        """Create new monthly attendance sheet"""
-        try:
-            # Add new sheet
-            request = {
-                'addSheet': {
-                    'properties': {
-                        'title': sheet_name,
-                        'gridProperties': {
-                            'rowCount': 1000,
-                            'columnCount': 32  # 31 days + name column
-                        }
+    def monthly_sheet_request(self, sheet_name: str) -> Dict:
+        """addSheet request for a monthly attendance sheet"""
+        return {
+            'addSheet': {
+                'properties': {
+                    'title': sheet_name,
+                    'gridProperties': {
+                        'rowCount': 1000,
+                        'columnCount': 32  # 31 days + name column
                     }
                 }
             }
-            
-            self.service.spreadsheets().batchUpdate(
+        }
+    
+    async def create_monthly_sheet(self, sheet_name: str) -> bool:
+        """Create new monthly attendance sheet with its headers"""
+        try:
+            reply = await self.execute_async(self.service.spreadsheets().batchUpdate(
                 spreadsheetId=self.spreadsheet_id,
-                body={'requests': [request]}
-            ).execute()
+                body={'requests': [self.monthly_sheet_request(sheet_name)]}
+            ))
+            self.remember_added_sheets(reply)
             
             # Set up headers
             await self.setup_monthly_sheet_headers(sheet_name)
             
             logger.info(f"✅ Created new monthly sheet: {sheet_name}")
+            return True
             
         except Exception as e:
             logger.error(f"❌ Error creating monthly sheet: {e}")
+            return False
     
     async def setup_monthly_sheet_headers(self, sheet_name: str):
         """Set up headers for monthly attendance sheet"""
@@ -225,34 +395,13 @@ class GoogleSheetsService:
             for day in range(1, days_in_month + 1):
                 headers.append(f"{day:02d}/{month:02d}")
             
-            # Write headers in batches to avoid rate limiting
-            batch_size = 10  # Process 10 headers at a time
-            for i in range(0, len(headers), batch_size):
-                batch_headers = headers[i:i + batch_size]
-                batch_data = []
-                
-                for col_idx in range(i, min(i + batch_size, len(headers))):
-                    header_value = headers[col_idx]
-                    col_letter = self._column_index_to_letter(col_idx)
-                    batch_data.append({
-                        'range': f"'{sheet_name}'!{col_letter}1",
-                        'values': [[header_value]]
-                    })
-                
-                # Write batch
-                batch_body = {
-                    'valueInputOption': 'RAW',
-                    'data': batch_data
-                }
-                
-                self.service.spreadsheets().values().batchUpdate(
-                    spreadsheetId=self.spreadsheet_id,
-                    body=batch_body
-                ).execute()
-                
-                # Add delay between batches to avoid rate limiting
-                if i + batch_size < len(headers):
-                    await asyncio.sleep(0.5)  # 500ms delay
+            # Whole header row in one request
+            await self.execute_with_backoff(self.service.spreadsheets().values().update(
+                spreadsheetId=self.spreadsheet_id,
+                range=f"'{sheet_name}'!A1",
+                valueInputOption='RAW',
+                body={'values': [headers]}
+            ))
             
             logger.info(f"✅ Set up headers for {sheet_name}: {len(headers)} columns (A-{self._column_index_to_letter(len(headers)-1)})")
             return True
@@ -261,12 +410,12 @@ class GoogleSheetsService:
             logger.error(f"❌ Error setting up monthly sheet headers: {e}")
             # Try alternative approach - just write to A1
             try:
-                self.service.spreadsheets().values().update(
+                await self.execute_async(self.service.spreadsheets().values().update(
                     spreadsheetId=self.spreadsheet_id,
                     range=f"'{sheet_name}'!A1",
                     valueInputOption='RAW',
                     body={'values': [['Name']]}
-                ).execute()
+                ))
                 logger.info(f"✅ Set up basic header for {sheet_name}")
                 return False  # Return False because only basic header was set up
             except Exception as e2:
@@ -289,10 +438,10 @@ class GoogleSheetsService:
             
         try:
             # Read names column
-            result = self.service.spreadsheets().values().get(
+            result = await self.execute_async(self.service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range=f"{sheet_name}!A:A"
-            ).execute()
+            ))
             
             values = result.get('values', [])
             
@@ -314,21 +463,21 @@ class GoogleSheetsService:
             
         try:
             # Get next empty row
-            result = self.service.spreadsheets().values().get(
+            result = await self.execute_async(self.service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range=f"{sheet_name}!A:A"
-            ).execute()
+            ))
             
             values = result.get('values', [])
             next_row = len(values) + 1
             
             # Add worker name to new row
-            self.service.spreadsheets().values().update(
+            await self.execute_async(self.service.spreadsheets().values().update(
                 spreadsheetId=self.spreadsheet_id,
                 range=f"{sheet_name}!A{next_row}",
                 valueInputOption='RAW',
                 body={'values': [[worker_name]]}
-            ).execute()
+            ))
             
             logger.info(f"✅ Added worker row for {worker_name} in {sheet_name}")
             return next_row
@@ -359,8 +508,8 @@ class GoogleSheetsService:
             today_col = self.get_today_column_letter()
             cell_range = f"{sheet_name}!{today_col}{worker_row}"
             
-            logger.info(f"🔍 DEBUG UPDATE: Updating cell {cell_range} for worker {worker_name}")
-            logger.info(f"🔍 DEBUG UPDATE: Check-in time: {check_in_time}, Check-out time: {check_out_time}")
+            logger.debug("🔍 Updating cell %s for worker %s", cell_range, worker_name)
+            logger.debug("🔍 Check-in time: %s, check-out time: %s", check_in_time, check_out_time)
             
             # Prepare cell value
             if check_in_time and check_out_time:
@@ -370,19 +519,14 @@ class GoogleSheetsService:
             else:
                 cell_value = ""
             
-            logger.info(f"🔍 DEBUG UPDATE: Final cell value to write: '{cell_value}'")
+            logger.debug("🔍 Final cell value to write: '%s'", cell_value)
             
             # Update cell
             try:
-                result = self.service.spreadsheets().values().update(
-                    spreadsheetId=self.spreadsheet_id,
-                    range=cell_range,
-                    valueInputOption='RAW',
-                    body={'values': [[cell_value]]}
-                ).execute()
+                result = await self.write_coalescer.submit(cell_range, cell_value)
                 
                 logger.info(f"✅ Updated attendance for {worker_name}: {cell_value}")
-                logger.info(f"🔍 DEBUG UPDATE: API response: {result}")
+                logger.debug("🔍 API response: %s", result)
                 
             except Exception as api_error:
                 logger.error(f"❌ Google Sheets API error: {api_error}")
@@ -397,7 +541,7 @@ class GoogleSheetsService:
     async def get_worker_attendance_status(self, worker_name: str) -> Dict:
         """Get worker's current attendance status for today"""
         if not self.service:
-            return {'status': 'UNKNOWN', 'time': ''}
+            return {'status': AttendanceStatus.UNKNOWN, 'time': ''}
             
         try:
             sheet_name = self.get_current_month_sheet_name()
@@ -409,54 +553,47 @@ class GoogleSheetsService:
             worker_row = await self.find_worker_row_in_monthly_sheet(sheet_name, worker_name)
             
             if worker_row is None:
-                return {'status': 'NOT_REGISTERED', 'time': ''}
+                return {'status': AttendanceStatus.NOT_REGISTERED, 'time': ''}
             
             # Get today's column
             today_col = self.get_today_column_letter()
             cell_range = f"{sheet_name}!{today_col}{worker_row}"
             
-            logger.info(f"🔍 DEBUG ATTENDANCE: Reading cell {cell_range} for worker {worker_name}")
-            logger.info(f"🔍 DEBUG ATTENDANCE: Full spreadsheet URL: https://docs.google.com/spreadsheets/d/{self.spreadsheet_id}")
+            logger.debug("🔍 Reading cell %s for worker %s", cell_range, worker_name)
+            logger.debug("🔍 Full spreadsheet URL: https://docs.google.com/spreadsheets/d/%s", self.spreadsheet_id)
             
             # Read cell value
-            result = self.service.spreadsheets().values().get(
+            result = await self.execute_async(self.service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range=cell_range
-            ).execute()
+            ))
             
             values = result.get('values', [])
             cell_value = values[0][0] if values and values[0] else ""
             
-            logger.info(f"🔍 DEBUG ATTENDANCE: Cell value: '{cell_value}' (length: {len(cell_value)})")
-            
-            # Determine status
-            time = ""  # Initialize time variable
-            if not cell_value:
-                status = 'NOT_CHECKED_IN'
-                logger.info(f"🔍 DEBUG ATTENDANCE: Status = NOT_CHECKED_IN (empty cell)")
-            elif cell_value.endswith('-'):
-                status = 'CHECKED_IN'
-                time = cell_value[:-1]  # Remove trailing dash
-                logger.info(f"🔍 DEBUG ATTENDANCE: Status = CHECKED_IN (ends with -), time = '{time}'")
-            elif '-' in cell_value:
-                status = 'COMPLETE'
-                time = cell_value
-                logger.info(f"🔍 DEBUG ATTENDANCE: Status = COMPLETE (contains -), time = '{time}'")
-            else:
-                status = 'UNKNOWN'
-                time = cell_value
-                logger.info(f"🔍 DEBUG ATTENDANCE: Status = UNKNOWN (unexpected format), time = '{time}'")
+            logger.debug("🔍 Cell value: '%s' (length: %d)", cell_value, len(cell_value))
             
-            logger.info(f"🔍 DEBUG ATTENDANCE: Final result - status: {status}, time: '{time}'")
+            attendance_status = self._parse_attendance_cell(cell_value)
             
-            return {
-                'status': status,
-                'time': time
-            }
+            logger.debug("🔍 Final result - status: %s, time: '%s'", attendance_status['status'].name, attendance_status['time'])
+            
+            return attendance_status
             
         except Exception as e:
             logger.error(f"❌ Error getting attendance status: {e}")
-            return {'status': 'ERROR', 'time': ''}
+            return {'status': AttendanceStatus.ERROR, 'time': ''}
+    
+    def _parse_attendance_cell(self, cell_value: str) -> Dict:
+        """Turn an attendance cell ('', 'HH:MM-' or 'HH:MM-HH:MM') into a status dict"""
+        if not cell_value:
+            return {'status': AttendanceStatus.NOT_CHECKED_IN, 'time': ''}
+        if cell_value.endswith('-'):
+            # Remove trailing dash
+            return {'status': AttendanceStatus.CHECKED_IN, 'time': cell_value[:-1]}
+        if '-' in cell_value:
+            return {'status': AttendanceStatus.COMPLETE, 'time': cell_value}
+        # Unexpected format
+        return {'status': AttendanceStatus.UNKNOWN, 'time': cell_value}
     
     async def find_worker_by_telegram_id(self, telegram_id: int) -> Optional[Dict]:
         """Find worker in Google Sheets by Telegram ID"""
@@ -465,16 +602,17 @@ class GoogleSheetsService:
             
         try:
             # Read the WORKERS sheet
-            result = self.service.spreadsheets().values().get(
+            result = await self.execute_async(self.service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range='WORKERS!A:D'
-            ).execute()
+            ))
             
             values = result.get('values', [])
             
             # Skip header row, search for telegram_id in column A
+            target_id = str(telegram_id)
             for row in values[1:]:
-                if len(row) >= 4 and str(row[0]) == str(telegram_id):
+                if len(row) >= 4 and row[0] == target_id:
                     return {
                         'telegram_id': int(row[0]),
                         'name': row[1],
@@ -504,13 +642,13 @@ class GoogleSheetsService:
             ]
             
             # Append to WORKERS sheet
-            result = self.service.spreadsheets().values().append(
+            result = await self.execute_async(self.service.spreadsheets().values().append(
                 spreadsheetId=self.spreadsheet_id,
                 range='WORKERS!A:D',
                 valueInputOption='RAW',
                 insertDataOption='INSERT_ROWS',
                 body={'values': [row_data]}
-            ).execute()
+            ))
             
             logger.info(f"✅ Worker added to Google Sheets: {name} ({phone})")
             return True
@@ -526,10 +664,10 @@ class GoogleSheetsService:
             
         try:
             # Find the row with this telegram_id
-            result = self.service.spreadsheets().values().get(
+            result = await self.execute_async(self.service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range='WORKERS!A:D'
-            ).execute()
+            ))
             
             values = result.get('values', [])
             
@@ -538,12 +676,12 @@ class GoogleSheetsService:
                 if len(row) >= 1 and str(row[0]) == str(telegram_id):
                     # Update status in column D
                     range_name = f'WORKERS!D{i}'
-                    self.service.spreadsheets().values().update(
+                    await self.execute_async(self.service.spreadsheets().values().update(
                         spreadsheetId=self.spreadsheet_id,
                         range=range_name,
                         valueInputOption='RAW',
                         body={'values': [[status]]}
-                    ).execute()
+                    ))
                     
                     logger.info(f"✅ Worker status updated: {telegram_id} -> {status}")
                     return True
@@ -560,10 +698,10 @@ class GoogleSheetsService:
             return []
             
         try:
-            result = self.service.spreadsheets().values().get(
+            result = await self.execute_async(self.service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range='WORKERS!A:D'
-            ).execute()
+            ))
             
             values = result.get('values', [])
             workers = []
@@ -588,7 +726,6 @@ class GoogleSheetsService:
     def get_active_week_sheet(self, date_str: str) -> str:
         """Get the active week sheet name for a given date"""
         try:
-            from datetime import datetime
             # Fix date format for macOS compatibility
             try:
                 # Try the original format first
@@ -627,59 +764,17 @@ class GoogleSheetsService:
         by checking B3 cell (Monday date) vs current week Monday
         """
         try:
-            from datetime import datetime, timedelta
-            
-            # Parse current date
-            try:
-                current_date = datetime.strptime(current_date_str, "%-m/%-d/%Y")
-            except ValueError:
-                current_date = datetime.strptime(current_date_str, "%m/%d/%Y")
-            
-            # Calculate current week Monday
-            days_since_monday = current_date.weekday()  # 0=Monday, 6=Sunday
-            current_week_monday = current_date - timedelta(days=days_since_monday)
-            
-            # Calculate next week Monday
-            next_week_monday = current_week_monday + timedelta(days=7)
-            
             # Read B3 cell (Monday date) from the sheet
             try:
                 result = self.service.spreadsheets().values().get(
                     spreadsheetId=self.spreadsheet_id,
                     range=f'{sheet_name}!B3'
-                ).execute()
+                ).execute(http=self._thread_http())
                 
                 values = result.get('values', [])
-                if not values or not values[0] or not values[0][0]:
-                    logger.warning(f"⚠️ Sheet {sheet_name} B3 is empty")
-                    return False
-                
-                # Parse B3 date
-                b3_date_str = str(values[0][0]).strip()
-                sheet_monday = None
-                
-                # Handle different date formats
-                if '/' in b3_date_str:
-                    if len(b3_date_str.split('/')) == 3:
-                        # Format: MM/DD/YYYY or DD/MM/YYYY
-                        if len(b3_date_str.split('/')[2]) == 4:  # YYYY
-                            sheet_monday = datetime.strptime(b3_date_str, "%m/%d/%Y")
-                        else:
-                            sheet_monday = datetime.strptime(b3_date_str, "%d/%m/%Y")
-                elif '-' in b3_date_str:
-                    # Format: YYYY-MM-DD
-                    sheet_monday = datetime.strptime(b3_date_str, "%Y-%m-%d")
+                b3_value = values[0][0] if values and values[0] else ""
                 
-                if not sheet_monday:
-                    logger.warning(f"⚠️ Could not parse B3 date: {b3_date_str}")
-                    return False
-                
-                # Compare dates
-                is_next_week = (sheet_monday.date() == next_week_monday.date())
-                
-                logger.info(f"📅 Sheet {sheet_name}: B3={sheet_monday.date()}, current_monday={current_week_monday.date()}, next_monday={next_week_monday.date()}, is_next_week={is_next_week}")
-                
-                return is_next_week
+                return self._is_next_week_monday(sheet_name, b3_value, current_date_str)
                 
             except Exception as e:
                 logger.warning(f"⚠️ Could not read B3 from sheet {sheet_name}: {e}")
@@ -689,6 +784,182 @@ class GoogleSheetsService:
             logger.error(f"❌ Error checking if sheet is for next week: {e}")
             return False
     
+    def _is_next_week_monday(self, sheet_name: str, b3_value, current_date_str: str) -> bool:
+        """Check whether a sheet's B3 value (Monday date) is next week's Monday"""
+        try:
+            # Parse current date
+            try:
+                current_date = datetime.strptime(current_date_str, "%-m/%-d/%Y")
+            except ValueError:
+                current_date = datetime.strptime(current_date_str, "%m/%d/%Y")
+            
+            # Calculate current week Monday
+            days_since_monday = current_date.weekday()  # 0=Monday, 6=Sunday
+            current_week_monday = current_date - timedelta(days=days_since_monday)
+            
+            # Calculate next week Monday
+            next_week_monday = current_week_monday + timedelta(days=7)
+            
+            if not b3_value:
+                logger.warning(f"⚠️ Sheet {sheet_name} B3 is empty")
+                return False
+            
+            # Parse B3 date
+            b3_date_str = str(b3_value).strip()
+            sheet_monday = None
+            
+            # Handle different date formats
+            if '/' in b3_date_str:
+                if len(b3_date_str.split('/')) == 3:
+                    # Format: MM/DD/YYYY or DD/MM/YYYY
+                    if len(b3_date_str.split('/')[2]) == 4:  # YYYY
+                        sheet_monday = datetime.strptime(b3_date_str, "%m/%d/%Y")
+                    else:
+                        sheet_monday = datetime.strptime(b3_date_str, "%d/%m/%Y")
+            elif '-' in b3_date_str:
+                # Format: YYYY-MM-DD
+                sheet_monday = datetime.strptime(b3_date_str, "%Y-%m-%d")
+            
+            if not sheet_monday:
+                logger.warning(f"⚠️ Could not parse B3 date: {b3_date_str}")
+                return False
+            
+            # Compare dates
+            is_next_week = (sheet_monday.date() == next_week_monday.date())
+            
+            logger.info(f"📅 Sheet {sheet_name}: B3={sheet_monday.date()}, current_monday={current_week_monday.date()}, next_monday={next_week_monday.date()}, is_next_week={is_next_week}")
+            
+            return is_next_week
+            
+        except Exception as e:
+            logger.warning(f"⚠️ Could not parse B3 from sheet {sheet_name}: {e}")
+            return False
+    
+    def _parse_weekly_row(self, values: List[List[str]], worker_name: str) -> Optional[Dict[str, str]]:
+        """Extract a worker's Monday-Sunday schedule from week sheet rows"""
+        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+        
+        # Find the employee row by name
+        for row in values:
+            if len(row) > 0 and row[0] == worker_name:
+                weekly_schedule = {}
+                
+                # Map each day to its schedule
+                for i, day in enumerate(days):
+                    day_col = i + 1
+                    if day_col < len(row):
+                        weekly_schedule[day] = row[day_col] if row[day_col] else ""
+                
+                return weekly_schedule
+        
+        return None
+    
+    async def get_two_week_schedules(self, worker_name: str, current_date_str: str) -> Tuple[Optional[Dict[str, str]], Optional[Dict[str, str]]]:
+        """
+        Get current and next week schedules for a worker with a single batchGet.
+        Next week is None unless its sheet actually contains next week data (B3 check).
+        """
+        if not self.service:
+            return None, None
+            
+        try:
+            current_week_sheet = self.get_active_week_sheet(current_date_str)
+            next_week_sheet = self.get_next_week_sheet(current_week_sheet)
+            
+            # One HTTP round-trip for both week sheets, off the event loop.
+            # Only name + Monday-Sunday columns (A:H) are read - B3 is inside that range too
+            result = await self.execute_async(self.service.spreadsheets().values().batchGet(
+                spreadsheetId=self.spreadsheet_id,
+                ranges=[f'{current_week_sheet}!A:H', f'{next_week_sheet}!A:H']
+            ))
+            
+            value_ranges = result.get('valueRanges', [])
+            current_values = value_ranges[0].get('values', []) if len(value_ranges) > 0 else []
+            next_values = value_ranges[1].get('values', []) if len(value_ranges) > 1 else []
+            
+            return self._parse_two_week_values(current_values, next_values, next_week_sheet, worker_name, current_date_str)
+            
+        except Exception as e:
+            logger.error(f"❌ Error getting two week schedules: {e}")
+            return None, None
+    
+    async def get_two_week_schedules_and_attendance(self, worker_name: str, current_date_str: str) -> Tuple[Optional[Dict[str, str]], Optional[Dict[str, str]], Dict]:
+        """
+        Get current and next week schedules plus today's attendance status with a single batchGet.
+        Falls back to the separate lookups if the combined read fails (e.g. this month's sheet is missing).
+        """
+        if not self.service:
+            return None, None, {'status': AttendanceStatus.UNKNOWN, 'time': ''}
+            
+        try:
+            current_week_sheet = self.get_active_week_sheet(current_date_str)
+            next_week_sheet = self.get_next_week_sheet(current_week_sheet)
+            month_sheet = self.get_current_month_sheet_name()
+            today_col = self.get_today_column_letter()
+            
+            # Both week sheets, the monthly names column and today's attendance column in one round-trip
+            result = await self.execute_async(self.service.spreadsheets().values().batchGet(
+                spreadsheetId=self.spreadsheet_id,
+                ranges=[
+                    f'{current_week_sheet}!A:H',
+                    f'{next_week_sheet}!A:H',
+                    f'{month_sheet}!A:A',
+                    f'{month_sheet}!{today_col}:{today_col}'
+                ]
+            ))
+        except Exception as e:
+            logger.warning(f"⚠️ Combined schedule/attendance read failed, using separate reads: {e}")
+            # Issue the fallback reads concurrently so this path still costs about one round-trip
+            (current_week_schedule, next_week_schedule), attendance_status = await asyncio.gather(
+                self.get_two_week_schedules(worker_name, current_date_str),
+                self.get_worker_attendance_status(worker_name)
+            )
+            return current_week_schedule, next_week_schedule, attendance_status
+        
+        try:
+            value_ranges = result.get('valueRanges', [])
+            range_values = [value_ranges[i].get('values', []) if len(value_ranges) > i else [] for i in range(4)]
+            current_values, next_values, name_values, today_values = range_values
+            
+            current_week_schedule, next_week_schedule = self._parse_two_week_values(
+                current_values, next_values, next_week_sheet, worker_name, current_date_str
+            )
+            
+            # Worker row in the monthly sheet (skip header row) - same index in today's column
+            worker_index = next((i for i, row in enumerate(name_values[1:], start=1) if row and row[0] == worker_name), None)
+            if worker_index is None:
+                attendance_status = {'status': AttendanceStatus.NOT_REGISTERED, 'time': ''}
+            else:
+                today_row = today_values[worker_index] if worker_index < len(today_values) else []
+                attendance_status = self._parse_attendance_cell(today_row[0] if today_row else "")
+            
+            return current_week_schedule, next_week_schedule, attendance_status
+            
+        except Exception as e:
+            logger.error(f"❌ Error getting schedules and attendance status: {e}")
+            return None, None, {'status': AttendanceStatus.ERROR, 'time': ''}
+    
+    def _parse_two_week_values(self, current_values: List[List[str]], next_values: List[List[str]], next_week_sheet: str,
+                               worker_name: str, current_date_str: str) -> Tuple[Optional[Dict[str, str]], Optional[Dict[str, str]]]:
+        """Parse a worker's current/next week schedules from the two week sheets' A:H values"""
+        # Current week
+        current_week_schedule = self._parse_weekly_row(current_values, worker_name) if current_values else None
+        
+        # Next week - B3 (row 3, column B) holds the sheet's Monday date
+        next_week_schedule = None
+        b3_value = next_values[2][1] if len(next_values) > 2 and len(next_values[2]) > 1 else ""
+        if self._is_next_week_monday(next_week_sheet, b3_value, current_date_str):
+            next_week_schedule = self._parse_weekly_row(next_values, worker_name)
+            
+            # Only return if we actually have schedule data
+            if not next_week_schedule or not any(next_week_schedule.values()):
+                logger.warning(f"⚠️ No schedule data found for {worker_name} in {next_week_sheet}")
+                next_week_schedule = None
+        else:
+            logger.info(f"📅 Sheet {next_week_sheet} contains old data, not showing next week schedule")
+        
+        return current_week_schedule, next_week_schedule
+    
     async def get_intelligent_next_week_schedule(self, current_date_str: str, worker_name: str) -> Optional[Dict]:
         """
         Get next week schedule only if the sheet actually contains next week data
@@ -701,7 +972,7 @@ class GoogleSheetsService:
             logger.info(f"🔍 Checking next week schedule: current_sheet={current_week_sheet}, next_sheet={next_week_sheet}")
             
             # Check if the next week sheet actually contains next week data
-            if not self.is_sheet_for_next_week(next_week_sheet, current_date_str):
+            if not await self.run_in_thread(self.is_sheet_for_next_week, next_week_sheet, current_date_str):
                 logger.info(f"📅 Sheet {next_week_sheet} contains old data, not showing next week schedule")
                 return None
             
@@ -709,10 +980,10 @@ class GoogleSheetsService:
             
             # Try to read from the next week sheet
             try:
-                result = self.service.spreadsheets().values().get(
+                result = await self.execute_async(self.service.spreadsheets().values().get(
                     spreadsheetId=self.spreadsheet_id,
                     range=f'{next_week_sheet}!A:Z'
-                ).execute()
+                ))
                 
                 values = result.get('values', [])
                 if not values:
@@ -760,10 +1031,10 @@ class GoogleSheetsService:
             
             # Try to read from the week sheet
             try:
-                result = self.service.spreadsheets().values().get(
+                result = await self.execute_async(self.service.spreadsheets().values().get(
                     spreadsheetId=self.spreadsheet_id,
                     range=f'{week_sheet}!A:Z'
-                ).execute()
+                ))
                 
                 values = result.get('values', [])
                 if not values:
@@ -787,7 +1058,6 @@ class GoogleSheetsService:
                 for row in values:
                     if len(row) > 0 and row[0] == worker_name:
                         # Find the day column (parse date to get day of week)
-                        from datetime import datetime
                         try:
                             date_obj = datetime.strptime(date_str, "%-m/%-d/%Y")
                         except ValueError:
@@ -831,10 +1101,10 @@ class GoogleSheetsService:
             
             # Try to read from the week sheet
             try:
-                result = self.service.spreadsheets().values().get(
+                result = await self.execute_async(self.service.spreadsheets().values().get(
                     spreadsheetId=self.spreadsheet_id,
                     range=f'{week_sheet}!A:Z'
-                ).execute()
+                ))
                 
                 values = result.get('values', [])
                 if not values:
@@ -886,10 +1156,10 @@ class GoogleSheetsService:
             
             # Try to read from the week sheet
             try:
-                result = self.service.spreadsheets().values().get(
+                result = await self.execute_async(self.service.spreadsheets().values().get(
                     spreadsheetId=self.spreadsheet_id,
                     range=f'{week_sheet}!A:Z'
-                ).execute()
+                ))
                 
                 values = result.get('values', [])
                 if not values:
@@ -899,7 +1169,6 @@ class GoogleSheetsService:
                 days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
                 
                 # Parse the date to get day of week
-                from datetime import datetime
                 try:
                     date_obj = datetime.strptime(date_str, "%-m/%-d/%Y")
                 except ValueError:
@@ -937,21 +1206,14 @@ class GoogleSheetsService:
             logger.error(f"❌ Error getting all employees for date: {e}")
             return []
 
-    async def style_monthly_sheet(self, sheet_name: str):
-        """Style the monthly sheet with colors and formatting"""
+    async def style_monthly_sheet(self, sheet_name: str, sheet_id: Optional[int] = None):
+        """Style the monthly sheet with colors and formatting (pass sheet_id when known to skip the lookup)"""
         try:
-            # Get sheet ID for styling
-            result = self.service.spreadsheets().get(
-                spreadsheetId=self.spreadsheet_id
-            ).execute()
-            
-            sheet_id = None
-            for sheet in result.get('sheets', []):
-                if sheet['properties']['title'] == sheet_name:
-                    sheet_id = sheet['properties']['sheetId']
-                    break
+            if sheet_id is None:
+                # Get sheet ID for styling
+                sheet_id = (await self.get_sheet_ids()).get(sheet_name)
             
-            if not sheet_id:
+            if sheet_id is None:
                 logger.error(f"❌ Could not find sheet ID for {sheet_name}")
                 return False
             
@@ -1028,10 +1290,10 @@ class GoogleSheetsService:
             ]
             
             # Apply styling
-            self.service.spreadsheets().batchUpdate(
+            await self.execute_with_backoff(self.service.spreadsheets().batchUpdate(
                 spreadsheetId=self.spreadsheet_id,
                 body={'requests': requests}
-            ).execute()
+            ))
             
             logger.info(f"✅ Styled monthly sheet: {sheet_name} with light blue names and light green dates")
             return True